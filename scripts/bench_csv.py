@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+import gzip
+import os
+import sys
+import tempfile
+import time
+
+from utils.fixtures import result_rows
+from utils.journal import CheckpointWriter, Journal
+from utils.settings import Settings
+from utils.transforms import RowTransform
+
+
+def batches(races, count):
+    """
+    Races from races, cycling through them until they have count rows between them.
+    """
+    written = 0
+    while written < count:
+        for rows in races:
+            yield rows
+            written += len(rows)
+            if written >= count:
+                return
+
+
+def string_join(path, races, count, compress, header):
+    """
+    Rows joined by hand with commas, as the writer did before csv.writer, so a value
+    containing a comma or quote corrupts its row.
+    """
+    raw = open(path, 'wb')
+    stream = gzip.GzipFile(fileobj=raw, mode='wb') if compress else raw
+
+    stream.write((','.join(header) + '\n').encode('utf-8'))
+    for rows in batches(races, count):
+        stream.write(('\n'.join(','.join(str(x) for x in row) for row in rows) + '\n').encode('utf-8'))
+
+    if compress:
+        stream.close()
+    raw.close()
+
+
+def csv_writer(path, races, count, compress, header):
+    journal = Journal(path, 'bench')
+
+    with CheckpointWriter(path, journal, compress) as output:
+        output.write_header(header)
+        for i, rows in enumerate(batches(races, count)):
+            output.write_rows(rows)
+            output.complete(str(i))
+
+    journal.remove()
+
+
+def main():
+    if len(sys.argv) > 2:
+        return print('Usage: ./bench_csv.py [rows]')
+
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 1000000
+
+    settings = Settings()
+    transform = RowTransform(settings.fields)
+    races = result_rows(settings.fields, transform.transforms)
+    rows = sum(len(rows) for rows in batches(races, count))
+
+    with tempfile.TemporaryDirectory() as tmp:
+        for compress in (False, True):
+            path = os.path.join(tmp, 'bench.csv.gz' if compress else 'bench.csv')
+
+            for name, write in (('string join', string_join), ('csv.writer', csv_writer)):
+                start = time.perf_counter()
+                write(path, races, count, compress, transform.header)
+                seconds = time.perf_counter() - start
+
+                size = os.path.getsize(path) / 1024 / 1024
+                print(
+                    f'{"gzip" if compress else "csv": <4} {name: <11} {seconds: >6.2f}s  '
+                    f'{rows / seconds / 1000: >5.0f}k rows/s  {size: >6.1f}MiB'
+                )
+
+
+if __name__ == '__main__':
+    main()
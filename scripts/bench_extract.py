@@ -0,0 +1,154 @@
+#!/usr/bin/env python3
+import os
+import pickle
+import subprocess
+import sys
+import tarfile
+import tempfile
+
+from io import BytesIO
+from orjson import loads
+
+from utils.fixtures import result_pages
+
+
+SCRIPTS_PATH = os.path.dirname(os.path.abspath(__file__))
+ROUNDS = 3
+
+# Run in the scripts folder of the tree being measured, so it uses that tree's Race.
+# Rows are keyed by field name, as older trees build comma joined lines with the race
+# fields ahead of the runner fields rather than rows in field order.
+DRIVER = '''
+import gc, pickle, sys, time
+from lxml import html
+from orjson import dumps
+from utils.race import Race
+from utils.settings import Settings
+
+pages_path, out_path, repeat, code = sys.argv[1], sys.argv[2], int(sys.argv[3]), sys.argv[4]
+with open(pages_path, 'rb') as f:
+    pages = pickle.load(f)
+
+fields = Settings().fields
+
+def race_rows(race):
+    if hasattr(race, 'rows'):
+        return [dict(zip(fields, map(str, row))) for row in race.rows]
+    names = [f for f in fields if f in race.race_info] + [f for f in fields if f in race.runner_info]
+    return [dict(zip(names, line.split(','))) for line in race.csv_data]
+
+times = []
+for _ in range(repeat):
+    gc.collect()
+    start = time.perf_counter()
+    for url, content in pages:
+        try:
+            Race(url, html.fromstring(content), code, fields)
+        except Exception:
+            pass
+    times.append(time.perf_counter() - start)
+
+rows = []
+for url, content in pages:
+    try:
+        rows.append(race_rows(Race(url, html.fromstring(content), code, fields)))
+    except Exception:
+        rows.append(None)
+
+with open(out_path, 'wb') as f:
+    f.write(dumps({'fields': fields, 'seconds': min(times), 'rows': rows}))
+'''
+
+
+def export_tree(revision, path):
+    """
+    Write the files of revision to path, returning its scripts folder.
+    """
+    archive = subprocess.run(
+        ['git', 'archive', revision], cwd=os.path.dirname(SCRIPTS_PATH), capture_output=True, check=True
+    )
+    with tarfile.open(fileobj=BytesIO(archive.stdout)) as tar:
+        tar.extractall(path)
+    return os.path.join(path, 'scripts')
+
+
+def measure(scripts_path, pages_path, repeat, code):
+    out_path = pages_path + '.out'
+    subprocess.run(
+        [sys.executable, '-c', DRIVER, pages_path, out_path, str(repeat), code],
+        cwd=scripts_path, stdout=subprocess.DEVNULL, check=True,
+    )
+    with open(out_path, 'rb') as f:
+        return loads(f.read())
+
+
+def compare(old, new):
+    """
+    Print how many races have identical rows and which fields differ in the others.
+    """
+    fields = [field for field in new['fields'] if field in old['fields']]
+    same = 0
+    differing = {}
+
+    for old_rows, new_rows in zip(old['rows'], new['rows']):
+        if old_rows is None or new_rows is None:
+            same += old_rows is new_rows
+            continue
+
+        mismatched = {
+            field for old_row, new_row in zip(old_rows, new_rows) for field in fields
+            if old_row.get(field) != new_row.get(field)
+        }
+        if len(old_rows) != len(new_rows):
+            mismatched.add('runners')
+
+        if not mismatched:
+            same += 1
+        for field in mismatched:
+            differing[field] = differing.get(field, 0) + 1
+
+    print(f'Identical rows for {same} of {len(new["rows"])} races over {len(fields)} common fields')
+    for field, races in sorted(differing.items()):
+        print(f'\t{field}: differs in {races} races')
+
+
+def main():
+    if len(sys.argv) > 4:
+        return print('Usage: ./bench_extract.py [old revision] [new revision] [repeat]')
+
+    old_revision = sys.argv[1] if len(sys.argv) > 1 else None
+    new_revision = sys.argv[2] if len(sys.argv) > 2 else None
+    repeat = int(sys.argv[3]) if len(sys.argv) > 3 else 3
+
+    pages = result_pages()
+    results = []
+
+    with tempfile.TemporaryDirectory() as tmp:
+        pages_path = os.path.join(tmp, 'pages.pickle')
+        with open(pages_path, 'wb') as f:
+            pickle.dump(pages, f)
+
+        trees = []
+        for label, revision in (('old', old_revision), ('new', new_revision)):
+            if revision is not None:
+                trees.append((revision, export_tree(revision, os.path.join(tmp, label))))
+            elif label == 'new':
+                trees.append(('working tree', SCRIPTS_PATH))
+
+        # the trees take turns so a slow spell on the machine does not favour one of them
+        for _ in range(ROUNDS):
+            for i, (_, scripts_path) in enumerate(trees):
+                result = measure(scripts_path, pages_path, repeat, 'jumps')
+                if len(results) <= i:
+                    results.append(result)
+                results[i]['seconds'] = min(results[i]['seconds'], result['seconds'])
+
+    for (revision, _), result in zip(trees, results):
+        print(f'{revision: >14}: {result["seconds"] / len(pages) * 1000:6.2f}ms per race, best of {ROUNDS * repeat}')
+
+    if len(results) == 2:
+        compare(*results)
+
+
+if __name__ == '__main__':
+    main()
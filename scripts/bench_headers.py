@@ -0,0 +1,48 @@
+#!/usr/bin/env python3
+import sys
+import timeit
+
+from random import choice, sample
+
+from utils.header import RandomHeader, load_user_agents
+
+
+class OldHeader:
+    """
+    RandomHeader as it was before the templates: a new dict and a random.sample per call.
+    """
+
+    def __init__(self):
+        self.user_agents = list(load_user_agents())
+
+    def header(self):
+        return {
+            'Accept': 'text/html,application/xhtml+xml,application/xml',
+            'Accept-Encoding': 'gzip, deflate, br',
+            'Accept-Language': 'en-GB,en-US;q=0.9,en;q=0.8',
+            'Referer': 'https://www.google.com/',
+            'Dnt': choice(('0', '1')),
+            'Connection': 'keep-alive',
+            'X-Forwarded-For': self.random_ip(),
+            'User-Agent': choice(self.user_agents),
+            'Upgrade-Insecure-Requests': '1'
+        }
+
+    def random_ip(self):
+        return '{}.{}.{}.{}'.format(*sample(range(0, 255), 4))
+
+
+def main():
+    if len(sys.argv) > 3:
+        return print('Usage: ./bench_headers.py [requests per second] [calls]')
+
+    rate = int(sys.argv[1]) if len(sys.argv) > 1 else 10000
+    calls = int(sys.argv[2]) if len(sys.argv) > 2 else 100000
+
+    for name, random_header in (('old header()', OldHeader()), ('header()', RandomHeader())):
+        seconds = min(timeit.repeat(random_header.header, number=calls, repeat=5)) / calls
+        print(f'{name: <12} {seconds * 1e6:5.2f}us per header  {seconds * rate * 100:4.1f}% of a core at {rate} req/s')
+
+
+if __name__ == '__main__':
+    main()
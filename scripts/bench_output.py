@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+import os
+import sys
+import tempfile
+import time
+
+from utils.columnar import ColumnarWriter, pa
+from utils.fixtures import result_rows
+from utils.journal import CheckpointWriter, Journal
+from utils.settings import Settings
+from utils.transforms import RowTransform, output_header
+
+
+def write(path, writer, races, count, header):
+    """
+    Write races to path with writer, the way scrape_races does, until count rows are written.
+    """
+    journal = Journal(path, 'bench')
+    written = 0
+    race_id = 0
+
+    with writer(path, journal) as output:
+        output.write_header(header)
+
+        while written < count:
+            for rows in races:
+                output.write_rows(rows)
+                output.complete(str(race_id))
+                race_id += 1
+                written += len(rows)
+                if written >= count:
+                    break
+
+    journal.remove()
+    return written
+
+
+def load(path, file_format):
+    if file_format == 'parquet':
+        return pa.parquet.read_table(path)
+    if file_format == 'arrow':
+        with pa.ipc.open_file(path) as reader:
+            return reader.read_all()
+    return pa.csv.read_csv(path)
+
+
+def main():
+    if len(sys.argv) > 2:
+        return print('Usage: ./bench_output.py [rows]')
+
+    if pa is None:
+        return print('pyarrow is needed to write and load the columnar formats: pip3 install pyarrow')
+
+    import pyarrow.csv
+    import pyarrow.parquet
+
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 200000
+
+    settings = Settings()
+    transform = RowTransform(settings.fields)
+    races = result_rows(settings.fields, transform.transforms)
+    fields = output_header(settings.fields)
+
+    formats = (
+        ('csv', 'csv', lambda path, journal: CheckpointWriter(path, journal)),
+        ('csv.gz', 'csv.gz', lambda path, journal: CheckpointWriter(path, journal, compress=True)),
+        ('parquet', 'parquet', lambda path, journal: ColumnarWriter(path, journal, fields, 'parquet')),
+        ('arrow', 'arrow', lambda path, journal: ColumnarWriter(path, journal, fields, 'arrow')),
+    )
+
+    print(f'{"format": <8} {"write": >8} {"size": >10} {"load": >8}')
+
+    with tempfile.TemporaryDirectory() as tmp:
+        for name, extension, writer in formats:
+            path = os.path.join(tmp, f'bench.{extension}')
+
+            start = time.perf_counter()
+            written = write(path, writer, races, count, transform.header)
+            write_seconds = time.perf_counter() - start
+
+            start = time.perf_counter()
+            table = load(path, name)
+            load_seconds = time.perf_counter() - start
+
+            if table.num_rows != written:
+                print(f'{name} loaded {table.num_rows} rows, expected {written}')
+
+            size = os.path.getsize(path) / 1024 / 1024
+            print(f'{name: <8} {write_seconds: >7.2f}s {size: >7.1f}MiB {load_seconds: >7.2f}s')
+
+    print(f'{written} rows of {len(fields)} columns, loaded with pyarrow')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+import gzip
+import os
+import sys
+import time
+
+from orjson import loads
+
+from utils.cache import PageCache
+from utils.parser import ParsePool
+from utils.settings import Settings
+from utils.transforms import RowTransform
+
+
+def cached_races(cache):
+    """
+    (url, content) for every race result page in the page cache.
+    """
+    pages = []
+
+    for _, _, path in cache.entries():
+        try:
+            with open(path[:-3] + '.json', 'rb') as f:
+                url = loads(f.read())['url']
+            if '/results/' not in url or len(url.rstrip('/').split('/')) < 8:
+                continue
+            with gzip.open(path, 'rb') as f:
+                pages.append((url, f.read()))
+        except (OSError, EOFError, ValueError, KeyError):
+            continue
+
+    return pages
+
+
+def main():
+    if len(sys.argv) > 3:
+        return print('Usage: ./bench_parse.py [flat|jumps] [max workers]')
+
+    code = sys.argv[1] if len(sys.argv) > 1 else 'flat'
+    max_workers = int(sys.argv[2]) if len(sys.argv) > 2 else os.cpu_count()
+
+    settings = Settings()
+    pages = cached_races(PageCache(settings.toml))
+
+    if not pages:
+        return print('No race pages in the cache, run a scrape with cache = true first.')
+
+    transforms = RowTransform(settings.fields).transforms
+
+    print(f'Parsing {len(pages)} cached race pages, {os.cpu_count()} cores')
+
+    for workers in range(1, max_workers + 1):
+        parse_pool = ParsePool(code, settings.fields, workers, transforms=transforms)
+
+        start = time.perf_counter()
+        rows = sum(len(result[4]) for result in parse_pool.parse(pages))
+        seconds = time.perf_counter() - start
+
+        print(f'{workers: >3} workers: {seconds:7.2f}s  {rows / seconds:8.0f} rows/s')
+
+
+if __name__ == '__main__':
+    main()
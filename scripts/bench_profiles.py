@@ -0,0 +1,59 @@
+#!/usr/bin/env python3
+import sys
+import time
+import tracemalloc
+
+from lxml import html
+from orjson import loads
+
+from utils.fixtures import profile_pages
+from utils.preloaded import preloaded_state
+
+
+def lxml_split(content):
+    """
+    How horse_name_selector read profiles before utils.preloaded: build the html tree and
+    split the state out of the first body script.
+    """
+    doc = html.fromstring(content)
+    json_str = (
+        doc.xpath('//body/script')[0]
+        .text.split('window.PRELOADED_STATE =')[1]
+        .split('\n')[0]
+        .strip()
+        .strip(';')
+    )
+    return loads(json_str)
+
+
+def main():
+    if len(sys.argv) > 2:
+        return print('Usage: ./bench_profiles.py [repeat]')
+
+    repeat = int(sys.argv[1]) if len(sys.argv) > 1 else 10
+
+    pages = profile_pages()
+    print(f'{len(pages)} profile pages, {sum(map(len, pages)) / len(pages) / 1024:.0f}KB average')
+
+    expected = [lxml_split(content) for content in pages]
+
+    for name, read in (('lxml + split', lxml_split), ('preloaded_state', preloaded_state)):
+        mismatched = sum(read(content) != state for content, state in zip(pages, expected))
+
+        start = time.process_time()
+        for _ in range(repeat):
+            for content in pages:
+                read(content)
+        cpu = (time.process_time() - start) / (repeat * len(pages)) * 1000
+
+        tracemalloc.start()
+        for content in pages:
+            read(content)
+        peak = tracemalloc.get_traced_memory()[1] / 1024
+        tracemalloc.stop()
+
+        print(f'{name: <16} {cpu:6.2f}ms cpu per profile  {peak:6.0f}KB peak  {mismatched} mismatched')
+
+
+if __name__ == '__main__':
+    main()
@@ -1,22 +1,34 @@
 #!/usr/bin/env python3
-import requests
+import os
+import sqlite3
 import sys
 from datetime import datetime, timedelta
 from lxml import html
 from orjson import loads
-from utils.header import RandomHeader
+from utils.async_funcs import RateGovernor, fetch_documents
+from utils.cache import ProfileCache
 from utils.lxml_funcs import find
+from utils.preloaded import preloaded_state
+from utils.settings import Settings
+from utils.transport import Transport
 
-random_header = RandomHeader()
+BASE_URL = 'https://www.racingpost.com'
+
+settings = Settings()
+transport = Transport(settings.toml)
+profile_cache = ProfileCache(settings.toml)
+
+def rate_governor():
+    return RateGovernor(transport.rate, settings.toml.get('max_per_host', 4), transport.retries, transport.backoff)
 
 def clean_name(name):
     if name:
-        return name.strip().replace("'", '').lower().title()
+        return name.strip()
     else:
         return ''
 
-def get_race_urls(session, racecard_url):
-    r = session.get(racecard_url, headers=random_header.header())
+def get_race_urls(racecard_url):
+    r = transport.get(racecard_url)
     doc = html.fromstring(r.content)
 
     race_urls = []
@@ -25,7 +37,7 @@ def get_race_urls(session, racecard_url):
         course = meeting.xpath(".//span[contains(@class, 'RC-accordion__courseName')]")[0]
         if valid_course(course.text_content().strip().lower()):
             for race in meeting.xpath(".//a[@class='RC-meetingItem__link js-navigate-url']"):
-                race_urls.append('https://www.racingpost.com' + race.attrib['href'])
+                race_urls.append(BASE_URL + race.attrib['href'])
 
     return sorted(list(set(race_urls)))
 
@@ -33,63 +45,115 @@ def valid_course(course):
     invalid = ['free to air', 'worldwide stakes', '(arab)']
     return all([x not in course for x in invalid])
 
-def get_runners(session, profile_urls):
-    runners = []
+def get_runners(profile_urls):
+    """
+    Horse names by profile url. Profiles are fetched concurrently, once for each horse
+    however many races it runs in, and the profile cache holds their json between runs.
+    """
+    runners = {}
+    urls = dict.fromkeys(profile_urls)
 
-    for url in profile_urls:
-        r = session.get(url, headers=random_header.header())
-        doc = html.fromstring(r.content)
+    for url, content in fetch_documents(urls, rate_governor(), profile_cache, transport=transport):
+        if content is None:
+            continue
 
         try:
-            json_str = (
-                doc.xpath('//body/script')[0]
-                .text.split('window.PRELOADED_STATE =')[1]
-                .split('\n')[0]
-                .strip()
-                .strip(';')
-            )
-            js = loads(json_str)
-            horse_name = clean_name(js['profile']['horseName'])
-            runners.append(horse_name)
-        except (IndexError, KeyError):
+            state = loads(content) if profile_cache.enabled else preloaded_state(content)
+            runners[url] = clean_name(state['profile']['horseName'])
+        except (KeyError, TypeError, ValueError):
             continue
 
     return runners
 
-def generate_sql(race_name, horse_names):
-    names = "', '".join(horse_names)
-    # print(names)
-    return f"-- SQL for race: {race_name}\nSELECT date, horse, course, going, pos, ts, rpr, dist_f, race_name from race_results where horse in ('{names}');"
+def parse_racecard(content):
+    doc = html.fromstring(content)
 
-def parse_races(session, race_urls):
-    race_sql_statements = []
+    race_name = find(doc, 'span', 'RC-header__raceInstanceTitle') or "Unnamed Race"
+    profile_hrefs = doc.xpath("//a[@data-test-selector='RC-cardPage-runnerName']/@href")
+    profile_urls = [BASE_URL + a.split('#')[0] + '/form' for a in profile_hrefs]
+
+    return race_name, profile_urls
+
+def generate_sql(race_name, horse_names, table='race_results'):
+    names = "', '".join(name.lower().replace("'", "''") for name in horse_names)
+    return f"-- SQL for race: {race_name}\nSELECT date, horse, course, going, pos, ts, rpr, dist_f, race_name from {table} where trim(lower(horse)) in ('{names}');"
+
+FORM_COLUMNS = ('date', 'horse', 'course', 'going', 'pos', 'ts', 'rpr', 'dist_f', 'race_name')
+
+def open_database(path, table):
+    """
+    Connection to the SQLite database at path, or None after printing why if it or
+    the columns query_form needs from table are missing.
+    """
+    if not os.path.isfile(path):
+        print(f'Database {path} does not exist, enable [sqlite] in the settings and scrape some races first.')
+        return None
+
+    conn = sqlite3.connect(path)
+    columns = {row[1] for row in conn.execute(f'PRAGMA table_info("{table}")')}
+
+    if not columns:
+        print(f'Table {table} does not exist in {path}.')
+    elif not {'date', 'horse'} <= columns:
+        print(f'Table {table} in {path} has no date and horse columns.')
+    else:
+        return conn
+
+    conn.close()
+    return None
+
+def query_form(conn, race_name, horse_ids, horse_names, table='race_results'):
+    columns = {row[1] for row in conn.execute(f'PRAGMA table_info("{table}")')}
+    select = ', '.join(f'"{c}"' for c in FORM_COLUMNS if c in columns)
 
-    for url in race_urls:
-        r = session.get(url, headers=random_header.header())
-        if r.status_code != 200:
+    if 'horse_id' in columns:
+        where, params = '"horse_id"', horse_ids
+    else:
+        where, params = 'trim(lower("horse"))', [name.strip().lower() for name in horse_names]
+
+    placeholders = ', '.join('?' for _ in params)
+    rows = conn.execute(
+        f'SELECT {select} FROM "{table}" WHERE {where} IN ({placeholders}) ORDER BY horse, date DESC',
+        params,
+    )
+
+    lines = [f'-- Form for race: {race_name}']
+    lines.extend(' | '.join('' if x is None else str(x) for x in row) for row in rows)
+    return '\n'.join(lines)
+
+def parse_races(race_urls, conn=None, table='race_results'):
+    racecards = []
+
+    for url, content in fetch_documents(race_urls, rate_governor(), transport=transport):
+        if content is None:
             continue
 
         try:
-            doc = html.fromstring(r.content)
+            racecards.append(parse_racecard(content))
         except Exception:
             continue
 
-        race_name = find(doc, 'span', 'RC-header__raceInstanceTitle') or "Unnamed Race"
-        profile_hrefs = doc.xpath("//a[@data-test-selector='RC-cardPage-runnerName']/@href")
-        profile_urls = ['https://www.racingpost.com' + a.split('#')[0] + '/form' for a in profile_hrefs]
+    runners = get_runners([url for _, profile_urls in racecards for url in profile_urls])
+
+    race_sql_statements = []
 
-        horse_names = get_runners(session, profile_urls)
+    for race_name, profile_urls in racecards:
+        horse_names = [runners[url] for url in profile_urls if url in runners]
         if horse_names:
-            race_sql = generate_sql(race_name, horse_names)
+            if conn is not None:
+                horse_ids = [url.split('/')[5] for url in profile_urls]
+                race_sql = query_form(conn, race_name, horse_ids, horse_names, table)
+            else:
+                race_sql = generate_sql(race_name, horse_names, table)
             race_sql_statements.append(race_sql)
 
     return race_sql_statements
 
 def main():
-    if len(sys.argv) != 2 or sys.argv[1].lower() not in {'today', 'tomorrow'}:
-        return print('Usage: ./horse_name_selector.py [today|tomorrow]')
+    if len(sys.argv) not in {2, 3} or sys.argv[1].lower() not in {'today', 'tomorrow'}:
+        return print('Usage: ./horse_name_selector.py [today|tomorrow] [sqlite database]')
 
-    racecard_url = 'https://www.racingpost.com/racecards'
+    racecard_url = BASE_URL + '/racecards'
 
     if sys.argv[1].lower() == 'today':
         date = datetime.today().strftime('%Y-%m-%d')
@@ -97,13 +161,32 @@ def main():
         date = (datetime.today() + timedelta(days=1)).strftime('%Y-%m-%d')
         racecard_url += '/tomorrow'
 
-    session = requests.Session()
-    race_urls = get_race_urls(session, racecard_url)
-    race_sql_statements = parse_races(session, race_urls)
+    sqlite = settings.toml.get('sqlite', {})
+    table = sqlite.get('table', 'race_results')
+
+    if len(sys.argv) == 3:
+        path = sys.argv[2]
+    else:
+        path = sqlite.get('path') if sqlite.get('enabled', False) else None
+
+    conn = None
+    if path is not None:
+        conn = open_database(path, table)
+        if conn is None:
+            sys.exit(1)
+
+    race_urls = get_race_urls(racecard_url)
+    race_sql_statements = parse_races(race_urls, conn, table)
 
     for sql in race_sql_statements:
         print(sql + "\n")
 
+    if profile_cache.enabled:
+        profile_cache.report()
+
+    if settings.toml.get('print_stats', False):
+        transport.stats.report()
+
 if __name__ == '__main__':
     main()
 
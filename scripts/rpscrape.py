@@ -1,32 +1,38 @@
 #!/usr/bin/env python3
 
-import gzip
-import requests
 import os
 import sys
-import csv
-import time
-from requests.adapters import HTTPAdapter
-from requests.packages.urllib3.util.retry import Retry
+from datetime import datetime
 from lxml import html
 
+from contextlib import ExitStack
 from dataclasses import dataclass
 
 from lxml import html
 from orjson import loads
 
 from utils.argparser import ArgParser
+from utils.async_funcs import Progress, RateGovernor, fetch_documents, get_jsons
+from utils.cache import PageCache
+from utils.columnar import ColumnarWriter
 from utils.completer import Completer
-from utils.header import RandomHeader
-from utils.race import Race, VoidRaceError
+from utils.filters import RaceFilter, RaceIndex
+from utils.journal import CheckpointWriter, Journal
+from utils.parser import ParsePool
 from utils.settings import Settings
+from utils.sinks import PostgresSink, SqliteSink
+from utils.sync import Manifest
+from utils.transport import REQUEST_ERRORS, EventLoop, Transport
+from utils.views import output_views
+from utils.transforms import RowTransform, output_header
 from utils.update import Update
 
 from utils.course import course_name, courses
-from utils.lxml_funcs import xpath
+from utils.lxml_funcs import enable_stats, print_stats, xpath
 
 settings = Settings()
-random_header = RandomHeader()
+page_cache = PageCache(settings.toml)
+transport = Transport(settings.toml)
 
 
 @dataclass
@@ -52,7 +58,43 @@ def check_for_update():
         sys.exit()
 
 
+def rate_governor():
+    return RateGovernor(
+        transport.rate,
+        settings.toml.get('max_per_host', 4),
+        transport.retries,
+        transport.backoff,
+    )
+
+
+def get(url, headers):
+    return transport.get(url, headers)
+
+
+def get_course_results(race_lists):
+    """
+    Yield (race_list, content) for each course results page, in the order given.
+    """
+    if not settings.toml.get('concurrent_fetch', False):
+        for race_list in race_lists:
+            yield race_list, page_cache.fetch(race_list.url, get)
+        return
+
+    governor = rate_governor()
+    progress = Progress(len(race_lists), 'Course results fetched')
+    batch_size = settings.toml.get('max_per_host', 4) * 4
+
+    with EventLoop(transport) as loop:
+        for i in range(0, len(race_lists), batch_size):
+            batch = [(race_list, race_list.url) for race_list in race_lists[i:i + batch_size]]
+            yield from loop.run(get_jsons(batch, governor, page_cache, progress, loop.session))
+
+
 def get_race_urls(tracks, years, code):
+    """
+    Yield race urls as each course results page is fetched. Pages are taken in course
+    and year order so the urls come out in the same order as sorting them all.
+    """
     urls = set()
 
     url_course = 'https://www.racingpost.com:443/profile/course/filter/results'
@@ -64,23 +106,33 @@ def get_race_urls(tracks, years, code):
         for year in years:
             url = f'{url_course}/{track[0]}/{year}/{code}/all-races'
             race_list = RaceList(*track, url)
-            race_lists.append(race_list)
+            race_lists.append((track[0], year, race_list))
+
+    race_lists = [race_list for _, _, race_list in sorted(race_lists, key=lambda x: x[:2])]
 
-    for race_list in race_lists:
-        r = requests.get(race_list.url, headers=random_header.header())
-        races = loads(r.text)['data']['principleRaceResults']
+    for race_list, content in get_course_results(race_lists):
+        if content is None:
+            continue
+
+        races = loads(content)['data']['principleRaceResults']
+        course_urls = set()
 
         if races:
             for race in races:
                 race_date = race['raceDatetime'][:10]
                 race_id = race['raceInstanceUid']
                 url = f'{url_result}/{race_list.course_id}/{race_list.course_name}/{race_date}/{race_id}'
-                urls.add(url.replace(' ', '-').replace("'", ''))
+                course_urls.add(url.replace(' ', '-').replace("'", ''))
 
-    return sorted(list(urls))
+        for url in sorted(course_urls - urls):
+            urls.add(url)
+            yield url
 
 
 def get_race_urls_date(dates, region):
+    """
+    Yield race urls a day at a time, sorted within each day.
+    """
     urls = set()
 
     days = [f'https://www.racingpost.com/results/{d}' for d in dates]
@@ -88,159 +140,226 @@ def get_race_urls_date(dates, region):
     course_ids = {course[0] for course in courses(region)}
 
     for day in days:
-        r = requests.get(day, headers=random_header.header())
-        doc = html.fromstring(r.content)
+        content = page_cache.fetch(day, get)
+        if content is None:
+            continue
+
+        doc = html.fromstring(content)
 
         races = xpath(doc, 'a', 'link-listCourseNameLink')
+        day_urls = set()
 
         for race in races:
             if race.attrib['href'].split('/')[2] in course_ids:
-                urls.add('https://www.racingpost.com' + race.attrib['href'])
+                day_urls.add('https://www.racingpost.com' + race.attrib['href'])
 
-    return sorted(list(urls))
+        for url in sorted(day_urls - urls):
+            urls.add(url)
+            yield url
 
 
-def amend_csv(file_path):
+def scrape_races(races, folder_name, file_name, file_extension, code, file_writer, append=False):
     """
-    Change the column header in column K1 from 'or' to 'bhaor', replace all '(IRE)', '(USA)', '(GB)', '(FR)', '(JPN)' 
-    instances with nothing, and replace non-numeric values in columns K, L, M, and I with 0 (except in row 1).
+    Scrape races and write results to a CSV file with echo commands.
+    Each race is fetched and parsed once and its rows written to every output view.
+    With append, rows are added to the end of existing files instead of replacing them.
+    Returns the ids of the races processed.
     """
-    print(f"Starting to process the CSV file: {file_path}")
-    
-    temp_file = file_path + '.tmp'  # Temporary file to store amended data
-    print(f"Creating a temporary file: {temp_file}")
+    out_dir = f'../data/{folder_name}/{code}'
+
+    if not os.path.exists(out_dir):
+        os.makedirs(out_dir)
+        print(f"Created output directory: {out_dir}")
+
+    transform = RowTransform(settings.fields)
 
     try:
-        with open(file_path, 'r', encoding='utf-8') as infile, open(temp_file, 'w', encoding='utf-8', newline='') as outfile:
-            print(f"Opened {file_path} for reading and {temp_file} for writing.")
-            
-            reader = csv.reader(infile)
-            writer = csv.writer(outfile)
-            
-            # Read the header row
-            header = next(reader)
-            print(f"Original header: {header}")
-            
-            # Modify the header only for column K (23rd column, index 23)
-            if len(header) > 22 and header[22] == 'or':  # Check if column X exists and has the value 'or'
-                header[22] = 'bhaor'
-            print(f"Updated header: {header}")
-            
-            # Write the updated header to the new file
-            writer.writerow(header)
-            
-            # List of nationalities to replace
-            nationalities = ['(IRE)', '(USA)', '(GB)', '(FR)', '(JPN)']
-            
-            # Process the remaining rows
-            for row in reader:
-                # Replace all instances of nationalities with nothing
-                updated_row = [
-                    cell if not any(nat in cell for nat in nationalities) else
-                    cell.replace('(IRE)', '').replace('(USA)', '').replace('(GB)', '').replace('(FR)', '').replace('(JPN)', '')
-                    for cell in row
-                ]
-                
-                # Replace non-numeric values in columns L, M, S, W, X, Y
-                for index in [11, 17, 21, 22, 23]:  # Indices for columns L, M, S, W, X, Y
-                    if index < len(updated_row):  # Ensure the column exists in the row
-                        try:
-                # Try converting the value to a float (handles both integers and decimals)
-                           float(updated_row[index])
-                        except ValueError:   
-                            updated_row[index] = '0'  # Replace with '0'         
-                
-                writer.writerow(updated_row)
-            print("Processed all rows, updated header, replaced nationalities, and handled non-numeric values.")
+        views = output_views(settings.toml, transform.header)
+
+        with ExitStack() as stack:
+            outputs = []
+
+            for view in views:
+                file_path = f'{out_dir}/{file_name}{view.suffix}.{file_extension}'
+                print(f"Starting to scrape races. Output file: {file_path}")
+
+                journal = Journal(file_path, settings.csv_header)
+
+                if append and not journal.offset and os.path.isfile(file_path):
+                    journal.offset = os.path.getsize(file_path)
+
+                output = stack.enter_context(file_writer(file_path, journal))
+
+                if not output.resumed:
+                    output.write_header(transform.header)
+                    print("Wrote header.")
+
+                outputs.append((view, journal, output))
+
+            sinks = open_sinks(stack, transform.header)
+            completed = set.intersection(*(journal.races for _, journal, _ in outputs))
+
+            race_filter = RaceFilter.from_settings(settings.toml, code, views)
+            race_index = RaceIndex(os.path.join(page_cache.path, 'races.json'), page_cache.enabled)
+            skipped = {'fetch': 0, 'parse': 0}
+
+            def wanted(url):
+                race_id = url.split('/')[7]
+                if race_id in completed:
+                    return False
+
+                known = race_index.get(race_id, code)
+                if known is not None:
+                    rejected = race_filter.reject(*known)
+                    if rejected:
+                        print(f"{rejected}. Skipping without fetching: {url}")
+                        skipped['fetch'] += 1
+                        return False
+
+                return True
+
+            races = (url for url in races if wanted(url))
+
+            pages = ((url, content) for url, content in fetch_pages(races) if content is not None)
+            parse_pool = ParsePool(
+                code, settings.fields, settings.toml.get('parse_workers', 1), race_filter, transform.transforms
+            )
+
+            try:
+                for url, race_type, age_band, rejected, rows in parse_pool.parse(pages):
+                    print(f"Processing race URL: {url}")
+                    race_id = url.split('/')[7]
+
+                    if race_type is None:
+                        print(f"VoidRaceError encountered for URL: {url}. Skipping.")
+                    elif rejected:
+                        print(f"{rejected}. Skipping.")
+                        skipped['parse'] += 1
+                    else:
+                        for view, journal, output in outputs:
+                            if race_id not in journal.races:
+                                output.write_rows(view(rows))
+                        for sink in sinks:
+                            sink.write_rows(rows)
+                        print(f"Wrote race data for URL: {url}")
+
+                    if race_type is not None:
+                        race_index.add(race_id, code, race_type, age_band)
+
+                    for _, _, output in outputs:
+                        output.complete(race_id)
+                    completed.add(race_id)
+            finally:
+                race_index.save()
+
+        if skipped['fetch'] or skipped['parse']:
+            print(f"Filtered {skipped['fetch']} races before fetching and {skipped['parse']} after parsing only their header.")
+
+        print("Finished scraping races.")
+
+        for _, journal, _ in outputs:
+            journal.remove()
+
+        if settings.toml.get('print_stats', False):
+            print_stats()
+            parse_pool.print_stats()
+            transport.stats.report()
+            transport.rate.report()
+
+        return completed
     except Exception as e:
-        print(f"Error occurred while processing the CSV: {e}")
+        print(f"Error occurred during race scraping: {e}")
         raise
 
-    # Replace the original file with the updated file
-    os.replace(temp_file, file_path)
-    print(f"Replaced original CSV with updated CSV: {file_path}")
 
+def open_sinks(stack, header):
+    """
+    Open the database sinks enabled in settings, closed by stack.
+    """
+    sinks = []
+
+    if settings.toml.get('postgres', {}).get('enabled', False):
+        sinks.append(stack.enter_context(PostgresSink(settings.toml['postgres'], header)))
+
+    if settings.toml.get('sqlite', {}).get('enabled', False):
+        sinks.append(stack.enter_context(SqliteSink(settings.toml['sqlite'], header)))
 
+    return sinks
 
-    
-def scrape_races(races, folder_name, file_name, file_extension, code, file_writer):
+
+def fetch_pages(races):
     """
-    Scrape races and write results to a CSV file with echo commands.
+    Yield (url, content) for each race url as it is discovered, content is None if the request failed.
     """
-    out_dir = f'../data/{folder_name}/{code}'
+    if settings.toml.get('concurrent_fetch', False):
+        yield from fetch_documents(races, rate_governor(), page_cache, transport=transport)
+        return
 
-    if not os.path.exists(out_dir):
-        os.makedirs(out_dir)
-        print(f"Created output directory: {out_dir}")
+    def get_race(url, headers):
+        r = get(url, headers)
+        r.raise_for_status()  # Raise an HTTPError for bad responses (4xx and 5xx)
+        return r
 
-    file_path = f'{out_dir}/{file_name}.{file_extension}'
-    print(f"Starting to scrape races. Output file: {file_path}")
+    for url in races:
+        try:
+            yield url, page_cache.fetch(url, get_race)
+        except REQUEST_ERRORS as e:
+            print(f"Request error for URL: {url}. Error: {e}")
+            yield url, None
 
-    # Set up retry mechanism
-    session = requests.Session()
-    retry = Retry(connect=3, backoff_factor=0.5)
-    adapter = HTTPAdapter(max_retries=retry)
-    session.mount("http://", adapter)
-    session.mount("https://", adapter)
+
+def sync(dates, region, code, file_extension, file_writer):
+    """
+    Scrape races not already in the region and code's manifest and append them to its output,
+    then record them in the manifest. The output has its own name so a -d scrape of the same
+    region, which replaces rp_database_csv, never removes rows the manifest lists. Columnar
+    output cannot be appended to, so each sync writes a new file alongside the previous ones.
+    """
+    folder_name = 'dates/' + region
+    file_name = 'rp_sync'
+
+    if file_writer not in {writer_csv, writer_gzip}:
+        file_name = 'rp_sync_' + datetime.now().strftime('%Y%m%d_%H%M%S')
 
     try:
-        with file_writer(file_path) as csv:
-            csv.write(settings.csv_header + '\n')
-            print("Wrote CSV header.")
-
-            for url in races:
-                print(f"Processing race URL: {url}")
-
-                try:
-                    r = session.get(url, headers=random_header.header())
-                    r.raise_for_status()  # Raise an HTTPError for bad responses (4xx and 5xx)
-                    doc = html.fromstring(r.content)
-
-                    race = Race(url, doc, code, settings.fields)
-                    
-                    if code == 'flat' and race.race_info['type'] != 'Flat':
-                        print(f"Race type '{race.race_info['type']}' does not match 'Flat'. Skipping.")
-                        continue
-                    elif code == 'jumps' and race.race_info['type'] not in {'Hurdle'}:
-                        print(f"Race type '{race.race_info['type']}' does not match 'Hurdle'. Skipping.")
-                        continue
-
-                    for row in race.csv_data:
-                        csv.write(row + '\n')
-                        print(f"Wrote race data to CSV for URL: {url}")
-
-                except requests.exceptions.RequestException as e:
-                    print(f"Request error for URL: {url}. Error: {e}")
-                    continue
-                except VoidRaceError:
-                    print(f"VoidRaceError encountered for URL: {url}. Skipping.")
-                    continue
-
-                print("Time delay of 3 seconds before next scrape")
-                time.sleep(3)
+        manifest = Manifest(f'../data/{folder_name}/{code}/rp_sync_manifest.json', settings.csv_header)
+    except ValueError as e:
+        sys.exit(e)
 
-        print("Finished scraping races.")
-        
-        # Call amend_csv_change_header to update the header in column K1
-        amend_csv(file_path)
-        print("CSV header successfully amended.")
-    except Exception as e:
-        print(f"Error occurred during race scraping: {e}")
-        raise
-        
+    dates = dates or manifest.dates(settings.toml.get('sync_lookback_days', 3))
+    print(f'Syncing {region} {code} results from {dates[0]} to {dates[-1]}, {len(manifest.races)} races already synced.')
+
+    races = (url for url in get_race_urls_date(dates, region) if url.split('/')[7] not in manifest.races)
+
+    completed = scrape_races(races, folder_name, file_name, file_extension, code, file_writer, append=True)
+
+    manifest.update(completed, max(dates[-1], manifest.last_date or dates[-1]))
+    print(f'Synced {len(completed)} new races.')
 
-def writer_csv(file_path):
-    return open(file_path, 'w', encoding='utf-8')
 
+def writer_csv(file_path, journal):
+    return CheckpointWriter(file_path, journal)
 
-def writer_gzip(file_path):
-    return gzip.open(file_path, 'wt', encoding='utf-8')
+
+def writer_gzip(file_path, journal):
+    return CheckpointWriter(file_path, journal, compress=True)
+
+
+def writer_parquet(file_path, journal):
+    return ColumnarWriter(file_path, journal, output_header(settings.fields), 'parquet')
+
+
+def writer_arrow(file_path, journal):
+    return ColumnarWriter(file_path, journal, output_header(settings.fields), 'arrow')
 
 
 def main():
     if settings.toml is None:
         sys.exit()
 
+    if settings.toml.get('print_stats', False):
+        enable_stats()
+
     if settings.toml['auto_update']:
         check_for_update()
 
@@ -251,11 +370,25 @@ def main():
         file_extension = 'csv.gz'
         file_writer = writer_gzip
 
+    if settings.toml.get('output_format', 'csv') == 'parquet':
+        file_extension = 'parquet'
+        file_writer = writer_parquet
+    elif settings.toml.get('output_format', 'csv') == 'arrow':
+        file_extension = 'arrow'
+        file_writer = writer_arrow
+
     parser = ArgParser()
 
     if len(sys.argv) > 1:
         args = parser.parse_args(sys.argv[1:])
 
+        if args.cache_only:
+            page_cache.enabled = True
+            page_cache.offline = True
+
+        if args.sync:
+            return sync(parser.dates, args.region, args.type, file_extension, file_writer)
+
         if args.date:
             folder_name = 'dates/' + args.region
             file_name = "rp_database_csv"
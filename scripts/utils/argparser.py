@@ -41,6 +41,8 @@ INFO = {
     'region': 'Region code. 2 or 3 letter e.g ire',
     'year': 'Year or range of years. Format YYYY - e.g 2018 or 2019-2020',
     'type': 'Race type flat|jumps',
+    'cache_only': 'Build output from cached pages only, without any network requests',
+    'sync': 'Append results of races not already synced for the region and type, since the last sync or for the dates given',
 }
 
 
@@ -48,6 +50,7 @@ ERROR = {
     'arg_len': 'Error: Too many arguments.\n\tUsage:\n\t\t[rpscrape]> [region|course] [year|range] [flat|jumps]',
     'incompatible': 'Arguments incompatible.\n',
     'incompatible_course': 'Choose course or region, not both.',
+    'incompatible_sync': 'Sync scrapes results by date for a region, not by course or year.',
     'invalid_c_or_r': 'Invalid course or region',
     'invalid_course': 'Invalid Course code.\n\nExamples:\n\t\t-c 20\n\t\t-c 1083',
     'invalid_date': 'Invalid date. Format:\n\t\t-d YYYY/MM/DD\n\nExamples:\n\t\t-d 2020/01/19\n\t\t2020/01/19-2020/01/29',
@@ -74,6 +77,8 @@ class ArgParser:
         self.parser.add_argument('-r', '--region',  metavar='', type=str, help=INFO['region'])
         self.parser.add_argument('-y', '--year',    metavar='', type=str, help=INFO['year'])
         self.parser.add_argument('-t', '--type',    metavar='', type=str, help=INFO['type'])
+        self.parser.add_argument('--cache-only',    action='store_true', help=INFO['cache_only'])
+        self.parser.add_argument('--sync',          action='store_true', help=INFO['sync'])
 
     def parse_args(self, arg_list):
         args = self.parser.parse_args(args=arg_list)
@@ -87,6 +92,9 @@ class ArgParser:
 
             self.dates = get_dates(args.date)
 
+        if args.sync and any([args.course, args.year]):
+            self.parser.error(ERROR['incompatible'] + ERROR['incompatible_sync'])
+
         if args.course and args.region:
             self.parser.error(ERROR['incompatible'] + ERROR['incompatible_course'])
 
@@ -1,36 +1,179 @@
 import aiohttp
 import asyncio
 
+from collections import deque
+from time import perf_counter
+from urllib.parse import urlsplit
+
 from lxml import html
 
+from utils.transport import RETRY_STATUS, EventLoop, Transport
+
+
+class RateGovernor:
+
+    def __init__(self, rate, max_per_host=4, retries=3, backoff=0.5):
+        self.rate = rate
+        self.max_per_host = max_per_host
+        self.retries = retries
+        self.backoff = backoff
+        self.hosts = {}
+
+    def host_slot(self, url):
+        host = urlsplit(url).netloc
+        if host not in self.hosts:
+            self.hosts[host] = asyncio.Semaphore(self.max_per_host)
+        return self.hosts[host]
+
+    def reset_hosts(self):
+        self.hosts = {}
+
+
+class Progress:
+
+    def __init__(self, total, label):
+        self.total = total
+        self.label = label
+        self.done = 0
+
+    def update(self):
+        self.done += 1
+        print(f'\r{self.label}: {self.done}/{self.total}', end='', flush=True)
+        if self.done == self.total:
+            print()
+
+
+async def fetch_url(url, session, governor, cache=None):
+    """
+    Fetch url under the governor's rate and per host limits, retrying connection errors
+    and RETRY_STATUS responses with exponential backoff. Returns the response body, or
+    None for any other error status or if every attempt failed.
+    """
+    headers = {}
+
+    if cache is not None:
+        content = cache.load(url)
+        if content is not None:
+            return content
+        if cache.offline:
+            print(f'Not in cache: {url}')
+            return None
+        headers.update(cache.revalidation_headers(url))
+
+    for attempt in range(governor.retries + 1):
+        async with governor.host_slot(url):
+            await governor.rate.acquire()
+            start = perf_counter()
+            try:
+                async with session.get(url, headers=headers) as response:
+                    governor.rate.record(response.status, perf_counter() - start, response.headers.get('Retry-After'))
+
+                    if response.status == 304 and cache is not None:
+                        content = cache.refresh(url)
+                        if content is not None:
+                            return content
+                        headers = {}
+                        continue
+
+                    if response.status >= 400 and response.status not in RETRY_STATUS:
+                        print(f'Request error for URL: {url}. Status: {response.status}')
+                        return None
+
+                    response.raise_for_status()
+                    content = await response.read()
+
+                    if cache is not None:
+                        content = cache.store(url, content, response.headers)
 
-async def get_document(url, session):
-    async with session.get(url, allow_redirects=False) as response:
-        resp = await response.text()
-        doc = html.fromstring(resp) if resp else None
-        return url, doc
+                    return content
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                if not isinstance(e, aiohttp.ClientResponseError):
+                    governor.rate.record(None, perf_counter() - start)
+                if attempt == governor.retries:
+                    print(f"Request error for URL: {url}. Error: {e}")
+                    return None
 
+        await asyncio.sleep(governor.backoff * 2 ** attempt)
 
-async def get_documents(urls):
-    session = get_session()
-    ret = await asyncio.gather(*[get_document(url, session) for url in urls])
-    await session.close()
+
+async def get_document(url, session, governor=None, cache=None):
+    if governor is None:
+        async with session.get(url, allow_redirects=False) as response:
+            resp = await response.text()
+            doc = html.fromstring(resp) if resp else None
+            return url, doc
+
+    return url, await fetch_url(url, session, governor, cache)
+
+
+async def get_documents(urls, governor=None, cache=None, session=None):
+    if governor is not None:
+        governor.reset_hosts()
+
+    own_session = session is None
+    if own_session:
+        session = get_session()
+
+    ret = await asyncio.gather(*[get_document(url, session, governor, cache) for url in urls])
+
+    if own_session:
+        await session.close()
     return ret
 
 
-async def get_jsons(courses):
-    session = get_session()
-    ret = await asyncio.gather(*[get_json(course, session) for course in courses])
-    await session.close()
+async def get_jsons(courses, governor=None, cache=None, progress=None, session=None):
+    own_session = session is None
+    if own_session:
+        session = get_session()
+
+    if progress is None:
+        progress = Progress(len(courses), 'Course results fetched')
+
+    if governor is not None:
+        governor.reset_hosts()
+
+    ret = await asyncio.gather(*[get_json(course, session, governor, cache, progress) for course in courses])
+
+    if own_session:
+        await session.close()
     return ret
 
 
-async def get_json(course, session):
-    async with session.get(course[1]) as response:
-        resp = await response.text()
-        return course[0], resp
+async def get_json(course, session, governor=None, cache=None, progress=None):
+    if governor is None:
+        async with session.get(course[1]) as response:
+            resp = await response.text()
+            return course[0], resp
+
+    content = await fetch_url(course[1], session, governor, cache)
+    progress.update()
+    return course[0], content
+
+
+def get_session(transport=None):
+    return (transport or Transport()).async_session()
+
+
+def fetch_documents(urls, governor, cache=None, window=100, transport=None):
+    """
+    Fetch urls concurrently on a background event loop, each one as soon as it is taken
+    from the urls iterable, yielding (url, content) pairs in the same order. At most
+    window pages are fetched ahead of the caller, so fetching carries on while earlier
+    pages are parsed and written without holding more than window pages in memory.
+    """
+    governor.reset_hosts()
+    pending = deque()
+
+    with EventLoop(transport or Transport()) as loop:
+        loop.start()
+
+        for url in urls:
+            pending.append((url, loop.submit(fetch_url(url, loop.session, governor, cache))))
 
+            while pending and (len(pending) >= window or pending[0][1].done()):
+                url, future = pending.popleft()
+                yield url, future.result()
 
-def get_session():
-    session = aiohttp.ClientSession(connector=aiohttp.TCPConnector(limit=50), headers={'User-Agent': 'Mozilla/5.0'})
-    return session
+        while pending:
+            url, future = pending.popleft()
+            yield url, future.result()
@@ -0,0 +1,286 @@
+import gzip
+import os
+import time
+import zlib
+
+from datetime import date, datetime
+from hashlib import sha1
+from orjson import dumps, loads
+
+from utils.preloaded import preloaded_state
+
+
+HOUR = 60 * 60
+
+CACHE_PATH = os.path.normpath(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..', 'cache'))
+PROFILE_CACHE_PATH = os.path.normpath(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..', 'profile_cache'))
+
+
+def url_ttl(url):
+    """
+    Seconds a cached response for url stays fresh, None if it never expires.
+    Older race results and finished seasons never change, recent day listings and
+    the current season's course results are still being added to, and a race's
+    ratings are often filled in days after it is run.
+    """
+    parts = url.rstrip('/').split('/')
+
+    if '/profile/course/filter/results/' in url:
+        try:
+            if int(parts[-3]) < datetime.today().year - 1:
+                return None
+        except ValueError:
+            pass
+        return HOUR
+
+    if '/results/' in url and len(parts) in (5, 8):
+        day = parts[-1] if len(parts) == 5 else parts[-2]
+        try:
+            if (date.today() - date.fromisoformat(day)).days > 7:
+                return None
+        except ValueError:
+            pass
+        return HOUR
+
+    return None
+
+
+class PageCache:
+
+    def __init__(self, toml=None, path=CACHE_PATH):
+        toml = toml or {}
+
+        self.enabled = toml.get('cache', False)
+        self.offline = self.enabled and toml.get('cache_only', False)
+        self.max_size = toml.get('cache_size', 2048) * 1024 * 1024
+        self.path = path
+        self.size = None
+
+    def file_path(self, url, ext):
+        key = sha1(url.encode('utf-8')).hexdigest()
+        return os.path.join(self.path, key[:2], f'{key}.{ext}')
+
+    def meta(self, url):
+        try:
+            with open(self.file_path(url, 'json'), 'rb') as f:
+                return loads(f.read())
+        except (OSError, ValueError):
+            return None
+
+    def read(self, url):
+        """
+        Cached content for url, or None if it is missing or corrupt. A corrupt entry
+        is removed so the page is fetched again without revalidating it.
+        """
+        path = self.file_path(url, 'gz')
+        try:
+            with gzip.open(path, 'rb') as f:
+                content = f.read()
+        except FileNotFoundError:
+            return None
+        except (OSError, EOFError, zlib.error):
+            self.remove(path)
+            return None
+        os.utime(path)
+        return content
+
+    def load(self, url):
+        """
+        Cached content for url if it is still fresh, or if running offline, otherwise None.
+        """
+        if not self.enabled:
+            return None
+
+        meta = self.meta(url)
+        if meta is None:
+            return None
+
+        ttl = self.url_ttl(url)
+        if not self.offline and ttl is not None and time.time() - meta['fetched'] > ttl:
+            return None
+
+        return self.read(url)
+
+    def url_ttl(self, url):
+        return url_ttl(url)
+
+    def revalidation_headers(self, url):
+        headers = {}
+
+        if not self.enabled:
+            return headers
+
+        meta = self.meta(url)
+        if meta is not None:
+            if meta.get('etag'):
+                headers['If-None-Match'] = meta['etag']
+            if meta.get('last_modified'):
+                headers['If-Modified-Since'] = meta['last_modified']
+
+        return headers
+
+    def refresh(self, url):
+        """
+        Mark a stale entry as fresh again after a 304 response and return its content.
+        """
+        meta = self.meta(url)
+        meta['fetched'] = time.time()
+        self.write_meta(url, meta)
+        return self.read(url)
+
+    def store(self, url, content, headers):
+        """
+        Cache content for url and return it as it was cached.
+        """
+        if not self.enabled:
+            return content
+
+        path = self.file_path(url, 'gz')
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+
+        tmp = path + '.tmp'
+
+        with open(tmp, 'wb') as f:
+            f.write(gzip.compress(content))
+
+        os.replace(tmp, path)
+
+        self.write_meta(url, {
+            'url': url,
+            'fetched': time.time(),
+            'etag': headers.get('ETag', ''),
+            'last_modified': headers.get('Last-Modified', ''),
+        })
+
+        if self.size is None:
+            self.size = self.disk_usage()
+        self.size += os.path.getsize(path)
+
+        if self.size > self.max_size:
+            self.evict()
+
+        return content
+
+    def write_meta(self, url, meta):
+        path = self.file_path(url, 'json')
+        tmp = path + '.tmp'
+
+        with open(tmp, 'wb') as f:
+            f.write(dumps(meta))
+
+        os.replace(tmp, path)
+
+    def remove(self, path):
+        for p in (path, path[:-3] + '.json'):
+            try:
+                os.remove(p)
+            except OSError:
+                pass
+
+    def fetch(self, url, get):
+        """
+        Return content for url from the cache, or by calling get(url, headers) which
+        should return a requests.Response. Returns None when offline and url is not cached.
+        """
+        content = self.load(url)
+        if content is not None:
+            return content
+
+        if self.offline:
+            print(f'Not in cache: {url}')
+            return None
+
+        r = get(url, self.revalidation_headers(url))
+
+        if r.status_code == 304:
+            content = self.refresh(url)
+            if content is not None:
+                return content
+            r = get(url, {})
+
+        if r.status_code == 200:
+            return self.store(url, r.content, r.headers)
+
+        return r.content
+
+    def entries(self):
+        for root, _, files in os.walk(self.path):
+            for name in files:
+                if name.endswith('.gz'):
+                    path = os.path.join(root, name)
+                    yield os.path.getmtime(path), os.path.getsize(path), path
+
+    def disk_usage(self):
+        return sum(size for _, size, _ in self.entries())
+
+    def evict(self):
+        """
+        Remove least recently used entries until the cache is 90% of its maximum size.
+        """
+        target = self.max_size * 0.9
+
+        for _, size, path in sorted(self.entries()):
+            if self.size <= target:
+                break
+
+            self.remove(path)
+            self.size -= size
+
+
+class ProfileCache(PageCache):
+    """
+    Horse profile json from window.PRELOADED_STATE, keyed by horse id so every run and
+    every race a horse is declared in shares one entry. Entries are fresh for
+    profile_cache_ttl hours, then revalidated with the profile page's ETag or Last-Modified.
+    """
+
+    def __init__(self, toml=None, path=PROFILE_CACHE_PATH):
+        toml = toml or {}
+        super().__init__(toml, path)
+
+        self.enabled = toml.get('profile_cache', True)
+        self.offline = False
+        self.ttl = toml.get('profile_cache_ttl', 24) * HOUR
+
+        self.hits = 0
+        self.revalidated = 0
+        self.misses = 0
+
+    def file_path(self, url, ext):
+        horse_id = url.split('/')[5]
+        return os.path.join(self.path, horse_id[-2:], f'{horse_id}.{ext}')
+
+    def url_ttl(self, url):
+        return self.ttl
+
+    def load(self, url):
+        content = super().load(url)
+        if content is not None:
+            self.hits += 1
+        return content
+
+    def refresh(self, url):
+        self.revalidated += 1
+        return super().refresh(url)
+
+    def store(self, url, content, headers):
+        """
+        Cache the profile json from the page content and return it, or the page unchanged if it has none.
+        """
+        if not self.enabled:
+            return content
+
+        self.misses += 1
+
+        try:
+            state = preloaded_state(content)
+        except ValueError:
+            state = None
+
+        if state is None:
+            return content
+
+        return super().store(url, dumps(state), headers)
+
+    def report(self):
+        print(f'Profile cache: {self.hits} hits, {self.revalidated} revalidated, {self.misses} fetched')
@@ -0,0 +1,127 @@
+from datetime import date
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = None
+
+
+FIELD_TYPES = {
+    'date': 'date',
+    'age': 'int',
+    'bhaor': 'int',
+    'dist_y': 'int',
+    'draw': 'int',
+    'lbs': 'int',
+    'num': 'int',
+    'or': 'int',
+    'ran': 'int',
+    'rpr': 'int',
+    'ts': 'int',
+    'btn': 'float',
+    'dec': 'float',
+    'dist_m': 'float',
+    'ovr_btn': 'float',
+    'prize': 'float',
+    'secs': 'float',
+}
+
+
+def to_date(value):
+    try:
+        return date.fromisoformat(str(value))
+    except ValueError:
+        return None
+
+
+def to_float(value):
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def to_int(value):
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def to_str(value):
+    return None if value is None else str(value)
+
+
+CONVERTERS = {
+    'date': to_date,
+    'float': to_float,
+    'int': to_int,
+    'str': to_str,
+}
+
+
+def arrow_type(field_type):
+    return {
+        'date': pa.date32(),
+        'float': pa.float64(),
+        'int': pa.int64(),
+        'str': pa.string(),
+    }[field_type]
+
+
+class ColumnarWriter:
+    """
+    Writes rows as typed Parquet or Arrow IPC files, one row group per row_group_size rows.
+    Columnar files cannot be appended to, so an interrupted scrape always starts again.
+    """
+
+    def __init__(self, file_path, journal, fields, file_format='parquet', row_group_size=50000):
+        if pa is None:
+            raise ImportError('pyarrow is required for parquet and arrow output: pip3 install pyarrow')
+
+        journal.offset = 0
+        journal.races = set()
+
+        self.fields = fields
+        self.row_group_size = row_group_size
+        self.types = [FIELD_TYPES.get(field, 'str') for field in fields]
+        self.converters = [CONVERTERS[field_type] for field_type in self.types]
+        self.schema = pa.schema([(field, arrow_type(t)) for field, t in zip(fields, self.types)])
+        self.columns = [[] for _ in fields]
+
+        if file_format == 'parquet':
+            self.writer = pq.ParquetWriter(file_path, self.schema)
+        else:
+            self.writer = pa.ipc.new_file(file_path, self.schema)
+
+    @property
+    def resumed(self):
+        return False
+
+    def write_header(self, fields):
+        pass
+
+    def write_rows(self, rows):
+        for column, convert, values in zip(self.columns, self.converters, zip(*rows)):
+            column.extend(map(convert, values))
+
+        if len(self.columns[0]) >= self.row_group_size:
+            self.flush()
+
+    def complete(self, race_id):
+        pass
+
+    def flush(self):
+        if self.columns[0]:
+            arrays = [pa.array(column, type=field.type) for column, field in zip(self.columns, self.schema)]
+            self.writer.write_table(pa.Table.from_arrays(arrays, schema=self.schema))
+            self.columns = [[] for _ in self.fields]
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.flush()
+        self.writer.close()
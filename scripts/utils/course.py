@@ -1,25 +1,68 @@
+import os
+
+from collections import defaultdict
+from functools import lru_cache
+from types import MappingProxyType
+
 from orjson import loads
 
 
+COURSES_PATH = os.path.normpath(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..', 'courses', '_courses'))
+
+
+class CourseIndex:
+    """
+    Lookups over courses/_courses, built once per process by course_index().
+    """
+
+    def __init__(self, path=COURSES_PATH):
+        with open(path, 'r') as f:
+            courses = loads(f.read())
+
+        self.region_courses = MappingProxyType(
+            {region: tuple(course.items()) for region, course in courses.items()}
+        )
+        self.names = MappingProxyType(courses['all'])
+
+        regions = {}
+        ids = defaultdict(list)
+
+        for region, course in courses.items():
+            if region == 'all':
+                continue
+            for _id in course.keys():
+                regions.setdefault(_id, region.upper())
+
+        for _id, name in courses['all'].items():
+            ids[name.lower()].append(_id)
+
+        self.regions = MappingProxyType(regions)
+        self.ids = MappingProxyType({name: tuple(_ids) for name, _ids in ids.items()})
+
+
+@lru_cache(maxsize=None)
+def course_index():
+    return CourseIndex()
+
+
 def courses(code='all'):
-    courses = loads(open('../courses/_courses', 'r').read())
-    
-    for id, course in courses[code].items():
+    for id, course in course_index().region_courses[code]:
         yield id, course
         
         
 def course_name(code):
     if code.isalpha():
         return code
-    for course in courses():
-        if course[0] == code:
-            return course[1].replace(' ', '-')
+    name = course_index().names.get(code)
+    if name is not None:
+        return name.replace(' ', '-')
 
 
 def course_search(term):
-    for course in courses():
-        if term.lower() in course[1].lower():
-            print_course(course[0], course[1])
+    for name, ids in course_index().ids.items():
+        if term.lower() in name:
+            for _id in ids:
+                print_course(_id, course_index().names[_id])
 
 
 def print_course(code, course):
@@ -32,5 +75,4 @@ def print_courses(code='all'):
 
 
 def valid_course(code):
-    return code in {course[0] for course in courses()}
-        
\ No newline at end of file
+    return code in course_index().names
@@ -0,0 +1,104 @@
+import os
+
+from re import findall
+
+from orjson import dumps, loads
+
+
+MAX_AGE = 20
+
+# race types kept for each code when the settings have no race_types table
+RACE_TYPES = {'flat': ['Flat'], 'jumps': ['Hurdle']}
+
+
+def band_ages(age_band):
+    """
+    Ages allowed by an age band such as 2yo, 3yo+ or 4-6yo, None if the band does not say.
+    """
+    ages = [int(age) for age in findall(r'\d+', age_band)]
+
+    if not ages:
+        return None
+    if age_band.endswith('+'):
+        return set(range(ages[0], MAX_AGE + 1))
+    return set(range(ages[0], ages[-1] + 1))
+
+
+class RaceFilter:
+    """
+    Decides from a race's header whether any output wants its rows, so unwanted races are
+    dropped before their runners are parsed. types are the race types wanted, ages the
+    runner ages wanted by every output view, either None for any.
+    """
+
+    def __init__(self, types=None, ages=None):
+        self.types = set(types) if types else None
+        self.ages = {int(age) for age in ages} if ages else None
+
+    @classmethod
+    def from_settings(cls, toml, code, views):
+        types = toml.get('race_types', RACE_TYPES).get(code)
+
+        ages = set()
+        for view in views:
+            if 'age' not in view.filter_fields:
+                ages = None
+                break
+            ages.update(view.filter_fields['age'])
+
+        return cls(types, ages)
+
+    def can_reject(self):
+        return self.types is not None or self.ages is not None
+
+    def reject(self, race_type, age_band):
+        """
+        Why the race is not wanted, or an empty string if it is.
+        """
+        if self.types is not None and race_type not in self.types:
+            return f"Race type '{race_type}' does not match '{', '.join(sorted(self.types))}'"
+
+        if self.ages is not None:
+            ages = band_ages(age_band)
+            if ages is not None and not ages & self.ages:
+                return f"Age band '{age_band}' has no runners wanted by any view"
+
+        return ''
+
+
+class RaceIndex:
+    """
+    Race type and age band of every race whose header has been parsed, by race id and
+    code, kept with the page cache so races a filter rejects are not fetched again.
+    """
+
+    def __init__(self, path, enabled=True):
+        self.path = path
+        self.enabled = enabled
+        self.races = {}
+        self.changed = False
+
+        if enabled and os.path.isfile(path):
+            with open(path, 'rb') as f:
+                self.races = loads(f.read())
+
+    def get(self, race_id, code):
+        return self.races.get(f'{race_id}/{code}')
+
+    def add(self, race_id, code, race_type, age_band):
+        if self.enabled:
+            self.races[f'{race_id}/{code}'] = [race_type, age_band]
+            self.changed = True
+
+    def save(self):
+        if not self.changed:
+            return
+
+        os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+        tmp = self.path + '.tmp'
+
+        with open(tmp, 'wb') as f:
+            f.write(dumps(self.races))
+
+        os.replace(tmp, self.path)
+        self.changed = False
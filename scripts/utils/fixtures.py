@@ -0,0 +1,46 @@
+import gzip
+import os
+
+from utils.parser import parse_page
+
+
+FIXTURES_PATH = os.path.normpath(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..', 'fixtures'))
+
+
+def read_page(path):
+    with gzip.open(path, 'rb') as f:
+        return f.read()
+
+
+def result_pages():
+    """
+    (url, content) for every saved race result page in fixtures/results, in urls.txt order.
+    """
+    path = os.path.join(FIXTURES_PATH, 'results')
+
+    with open(os.path.join(path, 'urls.txt')) as f:
+        urls = f.read().split()
+
+    return [(url, read_page(os.path.join(path, f'{url.split("/")[-1]}.html.gz'))) for url in urls]
+
+
+def result_rows(fields, transforms=None, code='jumps'):
+    """
+    The rows of each fixture race that is not void, one list of rows per race.
+    """
+    races = []
+
+    for url, content in result_pages():
+        _, race_type, _, _, rows, _ = parse_page(url, content, code, fields, transforms=transforms)
+        if race_type is not None:
+            races.append(rows)
+
+    return races
+
+
+def profile_pages():
+    """
+    The content of every saved horse profile page in fixtures/profiles.
+    """
+    path = os.path.join(FIXTURES_PATH, 'profiles')
+    return [read_page(os.path.join(path, name)) for name in sorted(os.listdir(path)) if name.endswith('.html.gz')]
@@ -1,13 +1,29 @@
-from random import choice, sample
+import os
+
+from functools import lru_cache
+from random import choice, getrandbits
+
+
+AGENTS_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'agents', 'user-agents.txt')
+
+
+@lru_cache(maxsize=None)
+def load_user_agents(path=AGENTS_PATH):
+    with open(path) as f:
+        return tuple(line.strip() for line in f if line.strip())
 
 
 class RandomHeader:
+    """
+    Browser-like request headers. Templates with a user agent each are built once, so
+    header() only copies one and adds a random X-Forwarded-For.
+    """
 
-    def __init__(self) -> None:
-        self.user_agents = []
-        self.load_user_agents()
+    def __init__(self, pool_size=256):
+        self.user_agents = load_user_agents()
+        self.templates = [self.template() for _ in range(pool_size)]
 
-    def header(self):
+    def template(self):
         return {
             'Accept': 'text/html,application/xhtml+xml,application/xml',
             'Accept-Encoding': 'gzip, deflate, br',
@@ -15,15 +31,15 @@ class RandomHeader:
             'Referer': 'https://www.google.com/',
             'Dnt': choice(('0', '1')),
             'Connection': 'keep-alive',
-            'X-Forwarded-For': self.random_ip(),
             'User-Agent': choice(self.user_agents),
             'Upgrade-Insecure-Requests': '1'
         }
 
-    def load_user_agents(self):
-        with open('utils/agents/user-agents.txt') as f:
-            for line in f:
-                self.user_agents.append(line.strip())
+    def header(self):
+        header = choice(self.templates).copy()
+        header['X-Forwarded-For'] = self.random_ip()
+        return header
 
     def random_ip(self):
-        return '{}.{}.{}.{}'.format(*sample(range(0, 255), 4))
+        n = getrandbits(32)
+        return f'{n >> 24}.{n >> 16 & 255}.{n >> 8 & 255}.{n & 255}'
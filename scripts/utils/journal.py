@@ -0,0 +1,150 @@
+import csv
+import gzip
+import io
+import os
+import time
+
+
+class Journal:
+    """
+    Records races completed by a scrape along with the output file offset they were
+    flushed up to, so an interrupted scrape to the same file can resume where it stopped.
+    """
+
+    def __init__(self, file_path, header):
+        self.path = file_path + '.journal'
+        self.header = header
+        self.races = set()
+        self.offset = 0
+        self.load()
+
+    def load(self):
+        if not os.path.isfile(self.path):
+            return
+
+        with open(self.path, 'r', encoding='utf-8') as f:
+            lines = f.read().splitlines()
+
+        if not lines or lines[0] != self.header:
+            print(f'Ignoring journal from a different field set: {self.path}')
+            return
+
+        for line in lines[1:]:
+            try:
+                offset, race_ids = line.split(' ', 1)
+                offset = int(offset)
+            except ValueError:
+                break
+            self.offset = offset
+            self.races.update(race_ids.split(','))
+
+        if self.races:
+            print(f'Resuming from journal, {len(self.races)} races already written.')
+
+    def start(self):
+        if self.offset == 0 or not os.path.isfile(self.path):
+            with open(self.path, 'w', encoding='utf-8') as f:
+                f.write(self.header + '\n')
+
+    def record(self, race_ids, offset):
+        with open(self.path, 'a', encoding='utf-8') as f:
+            f.write(f'{offset} {",".join(race_ids)}\n')
+            f.flush()
+            os.fsync(f.fileno())
+
+        self.races.update(race_ids)
+        self.offset = offset
+
+    def remove(self):
+        if os.path.isfile(self.path):
+            os.remove(self.path)
+
+
+class CheckpointWriter:
+    """
+    CSV writer for plain or gzip output that only commits data to the journal at checkpoints.
+    Rows are held until the next checkpoint and then streamed through csv.writer, which
+    quotes values containing commas, quotes or newlines, to the plain or gzip stream. A
+    checkpoint is made once checkpoint_races races are complete and checkpoint_seconds
+    have passed since the last one. Each gzip checkpoint ends a gzip member, so the file
+    can be truncated back to the last checkpoint and appended to with a new member.
+    """
+
+    def __init__(self, file_path, journal, compress=False, checkpoint_races=10, checkpoint_seconds=1.0):
+        self.journal = journal
+        self.compress = compress
+        self.checkpoint_races = checkpoint_races
+        self.checkpoint_seconds = checkpoint_seconds
+        self.last_checkpoint = time.monotonic()
+        self.pending = []
+        self.rows = []
+
+        if journal.offset and os.path.isfile(file_path):
+            self.raw = open(file_path, 'r+b')
+            self.raw.truncate(journal.offset)
+            self.raw.seek(journal.offset)
+        else:
+            journal.offset = 0
+            journal.races = set()
+            self.raw = open(file_path, 'wb')
+
+        journal.start()
+        self.open_stream()
+
+    def open_stream(self):
+        stream = gzip.GzipFile(fileobj=self.raw, mode='wb') if self.compress else self.raw
+        self.stream = io.TextIOWrapper(stream, encoding='utf-8', newline='')
+        self.csv = csv.writer(self.stream)
+
+    @property
+    def resumed(self):
+        return self.journal.offset > 0
+
+    def write_header(self, fields):
+        self.write_rows([fields])
+
+    def write_rows(self, rows):
+        self.rows.extend(rows)
+
+    def complete(self, race_id):
+        self.pending.append(race_id)
+
+        if (
+            len(self.pending) >= self.checkpoint_races
+            and time.monotonic() - self.last_checkpoint >= self.checkpoint_seconds
+        ):
+            self.checkpoint()
+
+    def checkpoint(self, reopen=True):
+        self.csv.writerows(self.rows)
+        self.rows = []
+
+        if self.compress:
+            # closing the gzip stream ends its member but leaves the file open
+            self.stream.close()
+        else:
+            self.stream.flush()
+
+        self.raw.flush()
+        os.fsync(self.raw.fileno())
+        self.last_checkpoint = time.monotonic()
+
+        if self.pending:
+            self.journal.record(self.pending, self.raw.tell())
+            self.pending = []
+
+        if self.compress and reopen:
+            self.open_stream()
+
+    def close(self):
+        if not self.stream.closed:
+            self.stream.close()
+        self.raw.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.checkpoint(reopen=False)
+        self.close()
@@ -1,26 +1,103 @@
+from collections import defaultdict
+from functools import lru_cache
+from time import perf_counter
+
+from lxml import etree
+
+
+# selector -> [calls, seconds], only recorded after enable_stats()
+timings = defaultdict(lambda: [0, 0.0])
+record_timings = False
+
+
+def enable_stats():
+    global record_timings
+    record_timings = True
+
+
+@lru_cache(maxsize=512)
+def compile_selector(tag, value, property='data-test-selector', fn='', first=False):
+    path = f'.//{tag}[@{property}="{value}"]'
+    if first:
+        path = f'({path})[1]'
+    return etree.XPath(path + fn)
+
+
+def select(doc, tag, value, property, fn='', first=False):
+    selector = compile_selector(tag, value, property, fn, first)
+    if not record_timings:
+        return selector(doc)
+
+    start = perf_counter()
+    elements = selector(doc)
+
+    timing = timings[(tag, value, property, fn)]
+    timing[0] += 1
+    timing[1] += perf_counter() - start
+
+    return elements
+
+
 def find(doc, tag, value, property='data-test-selector', **kwargs):
     try:
-        element = doc.find(f'.//{tag}[@{property}="{value}"]')
+        element = select(doc, tag, value, property, first=True)[0]
         if 'attrib' in kwargs:
             return element.attrib[kwargs['attrib']]
         return element.text_content().strip()
-    except AttributeError:
+    except (AttributeError, IndexError, TypeError):
         return ''
 
 
 def find_element(doc, tag, value, property='data-test-selector', **kwargs):
     try:
-        element = doc.find(f'.//{tag}[@{property}="{value}"]')
+        element = select(doc, tag, value, property, first=True)[0]
         if 'attrib' in kwargs:
             return element.attrib[kwargs['attrib']]
         return element
-    except AttributeError:
-        return ''
-
+    except (AttributeError, IndexError, TypeError):
+        return None
 
 
 def xpath(doc, tag, value, property='data-test-selector', fn=''):
-    elements = doc.xpath(f'.//{tag}[@{property}="{value}"]{fn}')
+    elements = select(doc, tag, value, property, fn)
     if fn == '/text()':
         elements = [element.strip() for element in elements]
     return elements
+
+
+def xpath_many(doc, selectors):
+    """
+    Match several (tag, value, property) selectors in one traversal of doc.
+    Returns a list of matching elements in document order for each selector.
+    """
+    start = perf_counter() if record_timings else 0
+
+    keys = {}
+    for i, (tag, value, property) in enumerate(selectors):
+        keys.setdefault((tag, property, value), []).append(i)
+
+    properties = {property for _, _, property in selectors}
+    results = [[] for _ in selectors]
+
+    for element in doc.iter(*{tag for tag, _, _ in selectors}):
+        for property in properties:
+            for i in keys.get((element.tag, property, element.get(property)), ()):
+                results[i].append(element)
+
+    if record_timings:
+        timing = timings[('xpath_many', len(selectors))]
+        timing[0] += 1
+        timing[1] += perf_counter() - start
+
+    return results
+
+
+def print_stats():
+    info = compile_selector.cache_info()
+    lookups = info.hits + info.misses
+    hit_rate = info.hits / lookups * 100 if lookups else 0
+
+    print(f'Selector cache: {info.hits} hits, {info.misses} misses ({hit_rate:.1f}% hit rate)')
+
+    for selector, (calls, seconds) in sorted(timings.items(), key=lambda x: -x[1][1]):
+        print(f'\t{seconds * 1000:10.1f}ms  {calls: >8} calls  {selector}')
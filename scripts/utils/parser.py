@@ -0,0 +1,78 @@
+import os
+
+from collections import defaultdict, deque
+from concurrent.futures import ProcessPoolExecutor
+
+from lxml import html
+
+from utils.race import Race, VoidRaceError
+
+
+def parse_page(url, content, code, fields, race_filter=None, transforms=None):
+    """
+    Build a Race from raw page content and return (url, race_type, age_band, rejected, rows, timings).
+    Races race_filter rejects from their header fields are not parsed any further, rejected
+    says why and rows are empty. A race type of None means the race was void. rows have
+    transforms applied, see Race.create_rows. timings are the seconds spent in each field
+    extractor.
+    """
+    try:
+        race = Race(url, html.fromstring(content), code, fields, transforms, race_filter)
+    except VoidRaceError:
+        return url, None, '', '', [], {}
+
+    return url, race.race_info['type'], race.race_info['age_band'], race.rejected, race.rows, race.timings
+
+
+class ParsePool:
+
+    def __init__(self, code, fields, workers=1, race_filter=None, transforms=None):
+        self.code = code
+        self.fields = fields
+        self.race_filter = race_filter if race_filter is not None and race_filter.can_reject() else None
+        self.transforms = transforms
+        self.workers = workers if workers > 0 else os.cpu_count()
+        # extractor -> [calls, seconds]
+        self.timings = defaultdict(lambda: [0, 0.0])
+
+    def parse(self, pages):
+        """
+        Parse (url, content) pages, yielding parse_page results without their timings
+        in the same order as pages. The timings are added up in self.timings.
+        """
+        for *result, timings in self.results(pages):
+            for extractor, seconds in timings.items():
+                timing = self.timings[extractor]
+                timing[0] += 1
+                timing[1] += seconds
+
+            yield result
+
+    def results(self, pages):
+        if self.workers == 1:
+            for url, content in pages:
+                yield parse_page(url, content, self.code, self.fields, self.race_filter, self.transforms)
+            return
+
+        pending = deque()
+
+        with ProcessPoolExecutor(max_workers=self.workers) as executor:
+            for url, content in pages:
+                pending.append(
+                    executor.submit(
+                        parse_page, url, content, self.code, self.fields, self.race_filter, self.transforms
+                    )
+                )
+
+                while len(pending) > self.workers * 4:
+                    yield pending.popleft().result()
+
+            while pending:
+                yield pending.popleft().result()
+
+    def print_stats(self):
+        total = sum(seconds for _, seconds in self.timings.values())
+        print(f'Field extraction: {total * 1000:.1f}ms')
+
+        for extractor, (calls, seconds) in sorted(self.timings.items(), key=lambda x: -x[1][1]):
+            print(f'\t{seconds * 1000:10.1f}ms  {calls: >8} calls  {extractor}')
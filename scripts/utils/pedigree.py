@@ -15,8 +15,7 @@ class Pedigree:
         self.pedigree_info()
         
     def clean_name(self, name):
-        return name.replace('.', ' ').replace('  ', ' ').replace(',', '')\
-            .replace("'", '').strip()
+        return name.replace('.', ' ').replace('  ', ' ').strip()
         
     def get_dam(self, info_dam):
         dam = self.clean_name(info_dam.text.strip().strip('()'))
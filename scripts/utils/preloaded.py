@@ -0,0 +1,46 @@
+from json import JSONDecodeError, JSONDecoder
+
+from lxml import html
+from orjson import loads
+
+
+MARKER = b'window.PRELOADED_STATE ='
+TRAILING = b' \t\r;'
+
+
+def preloaded_state(content):
+    """
+    The window.PRELOADED_STATE json of a page as a dict, or None if it has none.
+    The json is sliced out of the raw response bytes with a memoryview and passed
+    straight to orjson, without decoding the page or building an html tree. Pages
+    laid out differently fall back to parsing the html.
+    """
+    start = content.find(MARKER)
+    if start == -1:
+        return None
+
+    start += len(MARKER)
+    end = content.find(b'\n', start)
+    if end == -1:
+        end = len(content)
+
+    while end > start and content[end - 1] in TRAILING:
+        end -= 1
+
+    try:
+        return loads(memoryview(content)[start:end])
+    except ValueError:
+        return preloaded_state_html(content)
+
+
+def preloaded_state_html(content):
+    for script in html.fromstring(content).iter('script'):
+        text = script.text or ''
+        if 'window.PRELOADED_STATE =' in text:
+            text = text.split('window.PRELOADED_STATE =', 1)[1].lstrip()
+            try:
+                return JSONDecoder().raw_decode(text)[0]
+            except JSONDecodeError:
+                return None
+
+    return None
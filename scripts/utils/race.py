@@ -1,17 +1,170 @@
 import sys
 
+from collections import defaultdict
+from functools import lru_cache
 from re import search, sub
+from time import perf_counter
+
+from lxml import etree
 
 from utils.pedigree import Pedigree
 
 from utils.date import convert_date
 from utils.going import get_surface
-from utils.lxml_funcs import find, xpath
 from utils.region import get_region
 
 
-regex_class = r'(\(|\s)(C|c)lass (\d|[A-Ha-h])(\)|\s)'
-regex_group = r'(\(|\s)((G|g)rade|(G|g)roup) (\d|[A-Ca-c]|I*)(\)|\s)'
+regex_class = r'(\(|\s)(C|c)lass (\d|[A-Ha-h])(\)|\s|,)'
+regex_group = r'(\(|\s)((G|g)rade|(G|g)roup) (\d|[A-Ca-c]|I*)(\)|\s|,)'
+
+
+# every (tag, property, value) Race reads from a results page, collected in one pass by index_elements
+SELECTORS = {
+    ('a', 'data-test-selector', 'link-horseName'),
+    ('a', 'data-test-selector', 'link-jockeyName'),
+    ('a', 'data-test-selector', 'link-silk'),
+    ('a', 'data-test-selector', 'link-trainerName'),
+    ('div', 'class', 'rp-raceInfo'),
+    ('div', 'data-test-selector', 'text-prizeMoney'),
+    ('h1', 'data-test-selector', 'RC-courseHeader__name'),
+    ('h2', 'class', 'rp-raceTimeCourseName__title'),
+    ('img', 'class', 'rp-horseTable__silk'),
+    ('span', 'class', 'rp-horseTable__horse__country'),
+    ('span', 'class', 'rp-horseTable__horse__price'),
+    ('span', 'class', 'rp-horseTable__pos__length'),
+    ('span', 'class', 'rp-horseTable__saddleClothNo'),
+    ('span', 'class', 'rp-raceTimeCourseName_class'),
+    ('span', 'class', 'rp-raceTimeCourseName_condition'),
+    ('span', 'class', 'rp-raceTimeCourseName_ratingBandAndAgesAllowed'),
+    ('span', 'data-ending', 'lb'),
+    ('span', 'data-ending', 'st'),
+    ('span', 'data-test-selector', 'block-distanceInd'),
+    ('span', 'data-test-selector', 'block-fullDistanceInd'),
+    ('span', 'data-test-selector', 'rp-raceInfo__value rp-raceInfo__value_black'),
+    ('span', 'data-test-selector', 'rp-raceTimeCourseName_hurdles'),
+    ('span', 'data-test-selector', 'text-horsePosition'),
+    ('span', 'data-test-selector', 'text-raceTime'),
+    ('sup', 'class', 'rp-horseTable__pos__draw'),
+    ('td', 'data-ending', 'OR'),
+    ('td', 'data-ending', 'RPR'),
+    ('td', 'data-ending', 'TS'),
+    ('td', 'data-test-selector', 'horse-age'),
+    ('tr', 'class', 'rp-horseTable__commentRow ng-cloak'),
+    ('tr', 'data-test-selector', 'block-pedigreeInfoFullResults'),
+}
+
+# classes matched with contains(@class, ...), indexed under (tag, 'class', CONTAINS)
+CONTAINS = None
+CONTAINS_CLASS = {
+    'a': 'rp-raceTimeCourseName__name',
+    'td': 'rp-horseTable__wgt',
+}
+
+PROPERTIES = ('class', 'data-test-selector', 'data-ending')
+TAGS = {tag for tag, _, _ in SELECTORS}
+
+TEXT = etree.XPath('text()')
+UL_LI = etree.XPath('ul/li')
+
+
+# (info, fields, method, fields read) for every field Race can extract. method returns the
+# values of fields, which are set in race_info or runner_info, and is only called when one
+# of them is wanted, directly or by another extractor. Extractors run in this order, so
+# each comes after the ones it reads from. title is the race name before it is cleaned.
+EXTRACTORS = (
+    ('race_info', ('course', 'course_id'), 'get_course_info', ()),
+    ('race_info', ('date',), 'get_race_date', ()),
+    ('race_info', ('region',), 'get_race_region', ('course_id',)),
+    ('race_info', ('race_id',), 'get_race_id', ()),
+    ('race_info', ('going',), 'get_race_going', ()),
+    ('race_info', ('surface',), 'get_race_surface', ('going',)),
+    ('race_info', ('off',), 'get_race_off', ()),
+    ('race_info', ('title',), 'get_race_title', ()),
+    ('race_info', ('pattern',), 'get_race_pattern', ('title',)),
+    ('race_info', ('race_name',), 'get_race_name', ('title',)),
+    ('race_info', ('age_band', 'rating_band'), 'parse_race_bands', ()),
+    ('race_info', ('class',), 'get_class', ('title', 'rating_band')),
+    ('race_info', ('sex_rest',), 'sex_restricted', ('race_name',)),
+    ('race_info', ('dist', 'dist_y', 'dist_f', 'dist_m'), 'get_race_distances', ('region',)),
+    ('race_info', ('type',), 'get_race_type', ('race_name', 'dist_m')),
+    ('runner_info', ('pos',), 'get_positions', ()),
+    ('runner_info', ('num',), 'get_numbers', ()),
+    ('race_info', ('ran',), 'get_num_runners', ('num',)),
+    (
+        'runner_info',
+        ('sire_id', 'sire', 'dam_id', 'dam', 'damsire_id', 'damsire'),
+        'get_pedigrees',
+        (),
+    ),
+    ('runner_info', ('sex',), 'get_sexs', ()),
+    ('runner_info', ('comment',), 'get_comments', ()),
+    ('runner_info', ('prize',), 'get_prizemoney', ('pos',)),
+    ('runner_info', ('draw',), 'get_draws', ()),
+    ('runner_info', ('ovr_btn', 'btn'), 'get_distance_btn', ('pos',)),
+    ('runner_info', ('sp',), 'get_starting_prices', ()),
+    ('runner_info', ('dec',), 'get_decimal_odds', ('sp',)),
+    ('runner_info', ('age',), 'get_horse_ages', ()),
+    ('runner_info', ('horse',), 'get_names_horse', ()),
+    ('runner_info', ('horse_id',), 'get_ids_horse', ()),
+    ('runner_info', ('jockey',), 'get_names_jockey', ()),
+    ('runner_info', ('jockey_id',), 'get_ids_jockey', ()),
+    ('runner_info', ('trainer',), 'get_names_trainer', ()),
+    ('runner_info', ('trainer_id',), 'get_ids_trainer', ()),
+    ('runner_info', ('owner',), 'get_names_owner', ()),
+    ('runner_info', ('owner_id',), 'get_ids_owner', ()),
+    ('runner_info', ('hg',), 'get_headgear', ()),
+    ('runner_info', ('wgt', 'lbs'), 'get_weights', ()),
+    ('runner_info', ('or',), 'get_official_ratings', ()),
+    ('runner_info', ('rpr',), 'get_rprs', ()),
+    ('runner_info', ('ts',), 'get_topspeeds', ()),
+    ('runner_info', ('silk_url',), 'get_silk_urls', ()),
+    ('runner_info', ('time',), 'get_finishing_times', ('btn', 'ovr_btn', 'going', 'course', 'type', 'ran')),
+    ('runner_info', ('secs',), 'time_to_seconds', ('time',)),
+)
+
+EXTRACTED_BY = {field: extractor for extractor in EXTRACTORS for field in extractor[1]}
+
+# type and age_band are returned for every race and pos finds void races
+HEADER_FIELDS = ('type', 'age_band')
+REQUIRED_FIELDS = HEADER_FIELDS + ('pos',)
+
+
+@lru_cache(maxsize=None)
+def needed_extractors(fields):
+    """
+    The extractors for fields and every extractor they read from, in the order they run.
+    Fields without an extractor are ignored.
+    """
+    needed = set()
+    pending = [field for field in fields if field in EXTRACTED_BY]
+
+    while pending:
+        extractor = EXTRACTED_BY[pending.pop()]
+        if extractor not in needed:
+            needed.add(extractor)
+            pending.extend(extractor[3])
+
+    return tuple(extractor for extractor in EXTRACTORS if extractor in needed)
+
+
+def index_elements(doc):
+    """
+    Walk the document once, grouping the elements matching SELECTORS in document order.
+    """
+    elements = defaultdict(list)
+
+    for element in doc.iter(*TAGS):
+        tag = element.tag
+
+        for prop in PROPERTIES:
+            key = (tag, prop, element.get(prop))
+            if key in SELECTORS:
+                elements[key].append(element)
+
+        if tag in CONTAINS_CLASS and CONTAINS_CLASS[tag] in element.get('class', ''):
+            elements[(tag, 'class', CONTAINS)].append(element)
+
+    return elements
 
 
 class VoidRaceError(Exception):
@@ -19,105 +172,66 @@ class VoidRaceError(Exception):
 
 
 class Race:
-    def __init__(self, url, document, code, fields):
+    def __init__(self, url, document, code, fields, transforms=None, race_filter=None):
+        """
+        The header fields are extracted first. A race race_filter rejects is left with
+        rejected saying why and no rows, otherwise the rest of fields are extracted
+        from the same document.
+        """
         self.url = url
+        self.url_split = url.split('/')
         self.doc = document
-        self.race_info = {}
+        self.elements = index_elements(document)
+        self.race_info = {'code': code}
         self.runner_info = {}
+        self.timings = {}
+        self.rejected = ''
+        self.rows = []
 
-        url_split = self.url.split('/')
+        header = needed_extractors(HEADER_FIELDS)
+        self.extract(header)
 
-        self.race_info['course'] = self.get_course(url_split[5])
+        if race_filter is not None:
+            self.rejected = race_filter.reject(self.race_info['type'], self.race_info['age_band'])
+            if self.rejected:
+                return
 
-        if self.race_info['course'] == 'Belmont At The Big A':
-            self.race_info['course_id'] = '255'
-            self.race_info['course'] = 'Aqueduct'
-        else:
-            self.race_info['course_id'] = url_split[4]
-
-        self.race_info['code'] = code
-        self.race_info['date'] = convert_date(url_split[6])
-        self.race_info['region'] = get_region(self.race_info['course_id'])
-        self.race_info['race_id'] = url_split[7]
-        self.race_info['going'] = find(
-            self.doc, 'span', 'rp-raceTimeCourseName_condition', property='class'
-        )
-        self.race_info['surface'] = get_surface(self.race_info['going'])
-        self.race_info['off'] = find(self.doc, 'span', 'text-raceTime')
-        self.race_info['race_name'] = find(
-            self.doc, 'h2', 'rp-raceTimeCourseName__title', property='class'
+        self.extract(
+            tuple(extractor for extractor in needed_extractors(REQUIRED_FIELDS + tuple(fields)) if extractor not in header)
         )
-        self.race_info['class'] = find(
-            self.doc, 'span', 'rp-raceTimeCourseName_class', property='class'
-        ).strip('()')
-        self.race_info['race_name'] = self.clean(self.race_info['race_name'])
-
-        if self.race_info['class'] == '':
-            self.race_info['class'] = self.get_race_class()
-
-        self.race_info['pattern'] = self.get_race_pattern()
-        self.race_info['race_name'] = self.clean_race_name(self.race_info['race_name'])
-        self.race_info['age_band'], self.race_info['rating_band'] = self.parse_race_bands()
-
-        if self.race_info['class'] == '' and self.race_info['rating_band'] != '':
-            self.race_info['class'] = self.get_class_from_rating()
-
-        self.race_info['sex_rest'] = self.sex_restricted()
-        (
-            self.race_info['dist'],
-            self.race_info['dist_y'],
-            self.race_info['dist_f'],
-            self.race_info['dist_m'],
-        ) = self.get_race_distances()
-        self.race_info['type'] = self.get_race_type()
-        self.race_info['ran'] = self.get_num_runners()
-
-        pedigree = Pedigree(xpath(self.doc, 'tr', 'block-pedigreeInfoFullResults', fn='/td'))
-
-        self.runner_info['sire_id'] = pedigree.id_sires
-        self.runner_info['sire'] = pedigree.sires
-        self.runner_info['dam_id'] = pedigree.id_dams
-        self.runner_info['dam'] = pedigree.dams
-        self.runner_info['damsire_id'] = pedigree.id_damsires
-        self.runner_info['damsire'] = pedigree.damsires
-        self.runner_info['sex'] = self.get_sexs(pedigree.pedigrees)
-        self.runner_info['comment'] = self.get_comments()
-        self.runner_info['pos'] = self.get_positions()
-        self.runner_info['prize'] = self.get_prizemoney()
-        self.runner_info['draw'] = self.get_draws()
-        self.runner_info['ovr_btn'], self.runner_info['btn'] = self.get_distance_btn()
-        self.runner_info['sp'] = self.get_starting_prices()
-        self.runner_info['dec'] = self.get_decimal_odds()
-        self.runner_info['num'] = self.get_numbers()
-
-        if not self.race_info['ran']:
-            self.race_info['ran'] = len(self.runner_info['num'])
-        else:
-            self.race_info['ran'] = int(self.race_info['ran'])
-
-        self.runner_info['age'] = self.get_horse_ages()
-        self.runner_info['horse'] = self.get_names_horse()
-        self.runner_info['horse_id'] = self.get_ids_horse()
-        self.runner_info['jockey'] = self.get_names_jockey()
-        self.runner_info['jockey_id'] = self.get_ids_jockey()
-        self.runner_info['trainer'] = self.get_names_trainer()
-        self.runner_info['trainer_id'] = self.get_ids_trainer()
-        self.runner_info['owner'] = self.get_names_owner()
-        self.runner_info['owner_id'] = self.get_ids_owner()
-        self.runner_info['hg'] = self.get_headgear()
-
-        self.runner_info['wgt'], self.runner_info['lbs'] = self.get_weights()
-        self.runner_info['or'] = xpath(self.doc, 'td', 'OR', 'data-ending', fn='/text()')
-        self.runner_info['rpr'] = xpath(self.doc, 'td', 'RPR', 'data-ending', fn='/text()')
-        self.runner_info['ts'] = xpath(self.doc, 'td', 'TS', 'data-ending', fn='/text()')
-        self.runner_info['silk_url'] = xpath(self.doc, 'img', 'rp-horseTable__silk', 'class', fn='/@src')
-
-        self.runner_info['time'] = self.get_finishing_times()
-        self.runner_info['secs'] = self.time_to_seconds(self.runner_info['time'])
 
         self.clean_non_completions()
 
-        self.csv_data = self.create_csv_data(fields)
+        self.rows = self.create_rows(fields, transforms)
+
+    def extract(self, extractors):
+        for info, names, method, _ in extractors:
+            start = perf_counter()
+            values = getattr(self, method)()
+            self.timings['/'.join(names)] = perf_counter() - start
+
+            if len(names) == 1:
+                values = (values,)
+
+            getattr(self, info).update(zip(names, values))
+
+    def find(self, tag, value, property='data-test-selector'):
+        elements = self.elements[(tag, property, value)]
+        if elements:
+            return elements[0].text_content().strip()
+        return ''
+
+    def xpath(self, tag, value, property='data-test-selector', fn=''):
+        elements = self.elements[(tag, property, value)]
+
+        if fn == '/text()':
+            return [text.strip() for element in elements for text in TEXT(element)]
+        if fn == '/td':
+            return [td for element in elements for td in element.findall('td')]
+        if fn.startswith('/@'):
+            return [element.get(fn[2:]) for element in elements if fn[2:] in element.attrib]
+
+        return elements
 
     def calculate_times(self, win_time, dist_btn, going, course, race_type):
         times = []
@@ -169,21 +283,22 @@ class Race:
     def clean(self, string):
         return (
             string.strip()
-            .replace(',', ' ')
-            .replace('"', '')
             .replace('\x80', '')
             .replace('\\x80', '')
             .replace('  ', ' ')
-            .replace("'", '')
         )
 
     def clean_non_completions(self):
+        columns = [
+            self.runner_info[field]
+            for field in ('time', 'secs', 'ovr_btn', 'btn')
+            if field in self.runner_info
+        ]
+
         for i, pos in enumerate(self.runner_info['pos']):
             if not pos.isnumeric() and pos != 'DSQ':
-                self.runner_info['time'][i] = '-'
-                self.runner_info['secs'][i] = '-'
-                self.runner_info['ovr_btn'][i] = '-'
-                self.runner_info['btn'][i] = '-'
+                for column in columns:
+                    column[i] = '-'
 
     def clean_race_name(self, race_name):
         clean_name = lambda race, x: race.replace(x, '').strip()
@@ -206,25 +321,31 @@ class Race:
 
         return self.clean(race_name)
 
-    def create_csv_data(self, fields):
-        csv_race_info = ''
+    def create_rows(self, fields, transforms=None):
+        """
+        A tuple of the values of fields for each runner, race fields first. The functions
+        transforms has for a field are applied to its values, once for a race field and a
+        column at a time for a runner field.
+        """
+        transforms = transforms or {}
 
+        race = []
         for field in fields:
             if field in self.race_info:
-                csv_race_info += f'{self.race_info[field]},'
-
-        runner_info = []
+                value = self.race_info[field]
+                for transform in transforms.get(field, ()):
+                    value = transform(value)
+                race.append(value)
 
+        columns = []
         for field in fields:
             if field in self.runner_info:
-                runner_info.append(self.runner_info[field])
-
-        csv = []
-
-        for row in zip(*runner_info):
-            csv.append(csv_race_info + ','.join(str(x) for x in row))
+                column = self.runner_info[field]
+                for transform in transforms.get(field, ()):
+                    column = map(transform, column)
+                columns.append(column)
 
-        return csv
+        return list(map(tuple(race).__add__, zip(*columns)))
 
     def distance_to_decimal(self, dist):
         return (
@@ -288,6 +409,17 @@ class Race:
 
         return decimal
 
+    def get_class(self):
+        race_class = self.find('span', 'rp-raceTimeCourseName_class', property='class').strip('()')
+
+        if race_class == '':
+            race_class = self.get_race_class()
+
+        if race_class == '' and self.race_info['rating_band'] != '':
+            race_class = self.get_class_from_rating()
+
+        return race_class
+
     def get_class_from_rating(self):
         try:
             upper_rating = int(self.race_ratings.split('-')[1])
@@ -323,23 +455,36 @@ class Race:
 
     def get_comments(self):
         def clean_comment(x):
-            return x.strip().replace('  ', '').replace(',', ' -').replace('\n', ' ').replace('\r', '')
-
-        coms = self.doc.xpath("//tr[@class='rp-horseTable__commentRow ng-cloak']/td/text()")
+            return x.strip().replace('  ', '').replace('\n', ' ').replace('\r', '')
+
+        coms = [
+            com
+            for row in self.elements[('tr', 'class', 'rp-horseTable__commentRow ng-cloak')]
+            for td in row.findall('td')
+            for com in TEXT(td)
+        ]
         return [clean_comment(com) for com in coms]
 
     def get_course(self, course_url):
-        course = find(self.doc, 'h1', 'RC-courseHeader__name')
+        course = self.find('h1', 'RC-courseHeader__name')
         if course == '':
             try:
-                course = self.doc.xpath("//a[contains(@class, 'rp-raceTimeCourseName__name')]/text()")[
-                    0
-                ].strip()
+                course = [
+                    text for a in self.elements[('a', 'class', CONTAINS)] for text in TEXT(a)
+                ][0].strip()
             except IndexError:
                 course = course_url.title()
 
         return course
 
+    def get_course_info(self):
+        course = self.get_course(self.url_split[5])
+
+        if course == 'Belmont At The Big A':
+            return 'Aqueduct', '255'
+
+        return course, self.url_split[4]
+
     def get_decimal_odds(self):
         odds = [sub('(F|J|C)', '', sp) for sp in self.runner_info['sp']]
         return self.fraction_to_decimal(odds)
@@ -348,7 +493,7 @@ class Race:
         btn = []
         ovr_btn = []
 
-        for x in xpath(self.doc, 'span', 'rp-horseTable__pos__length', 'class'):
+        for x in self.xpath('span', 'rp-horseTable__pos__length', 'class'):
             distances = x.findall('span')
 
             if len(distances) == 2:
@@ -394,7 +539,7 @@ class Race:
         return ovr_btn, btn
 
     def get_draws(self):
-        draws = xpath(self.doc, 'sup', 'rp-horseTable__pos__draw', 'class', fn='/text()')
+        draws = self.xpath('sup', 'rp-horseTable__pos__draw', 'class', fn='/text()')
         return [draw.replace('\xa0', ' ').strip().strip('()') for draw in draws]
 
     def get_finishing_times(self):
@@ -429,7 +574,7 @@ class Race:
     def get_headgear(self):
         headgear = []
 
-        for horse in self.doc.xpath("//td[contains(@class, 'rp-horseTable__wgt')]"):
+        for horse in self.elements[('td', 'class', CONTAINS)]:
             hg = horse.find('span[@class="rp-horseTable__headGear"]')
             if hg is not None:
                 try:
@@ -442,27 +587,27 @@ class Race:
         return headgear
 
     def get_horse_ages(self):
-        ages = xpath(self.doc, 'td', 'horse-age', fn='/text()')
+        ages = self.xpath('td', 'horse-age', fn='/text()')
         return [age.strip() for age in ages]
 
     def get_ids_horse(self):
-        horse_ids = xpath(self.doc, 'a', 'link-horseName', fn='/@href')
+        horse_ids = self.xpath('a', 'link-horseName', fn='/@href')
         return [horse_id.split('/')[3] for horse_id in horse_ids]
 
     def get_ids_jockey(self):
-        jockey_ids = xpath(self.doc, 'a', 'link-jockeyName', fn='/@href')
+        jockey_ids = self.xpath('a', 'link-jockeyName', fn='/@href')
         return [jockey_id.split('/')[3] for jockey_id in jockey_ids[::2]]
 
     def get_ids_owner(self):
-        owner_ids = self.doc.xpath("//a[@data-test-selector='link-silk']/@href")
+        owner_ids = self.xpath('a', 'link-silk', fn='/@href')
         return [owner_id.split('/')[3] for owner_id in owner_ids]
 
     def get_ids_trainer(self):
-        trainer_ids = xpath(self.doc, 'a', 'link-trainerName', fn='/@href')
+        trainer_ids = self.xpath('a', 'link-trainerName', fn='/@href')
         return [trainer_id.split('/')[3] for trainer_id in trainer_ids[::2]]
 
     def get_names_horse(self):
-        horses = xpath(self.doc, 'a', 'link-horseName', fn='/text()')
+        horses = self.xpath('a', 'link-horseName', fn='/text()')
 
         joined = []
 
@@ -472,19 +617,19 @@ class Race:
         return joined
 
     def get_names_jockey(self):
-        jockeys = xpath(self.doc, 'a', 'link-jockeyName', fn='/text()')
+        jockeys = self.xpath('a', 'link-jockeyName', fn='/text()')
         return [self.clean(jock.strip()) for jock in jockeys[::3]]
 
     def get_names_owner(self):
-        owners = self.doc.xpath("//a[@data-test-selector='link-silk']/@href")
+        owners = self.xpath('a', 'link-silk', fn='/@href')
         return [owner.split('/')[4].replace('-', ' ').title() for owner in owners]
 
     def get_names_trainer(self):
-        trainers = xpath(self.doc, 'a', 'link-trainerName', fn='/text()')
+        trainers = self.xpath('a', 'link-trainerName', fn='/text()')
         return [self.clean(trainer.strip()) for trainer in trainers[::2][::2]]
 
     def get_nationaliies(self):
-        nats = xpath(self.doc, 'span', 'rp-horseTable__horse__country', 'class', fn='/text()')
+        nats = self.xpath('span', 'rp-horseTable__horse__country', 'class', fn='/text()')
         nationalities = []
 
         for nat in nats:
@@ -496,19 +641,35 @@ class Race:
         return nationalities
 
     def get_num_runners(self):
-        ran = find(self.doc, 'span', 'rp-raceInfo__value rp-raceInfo__value_black')
+        ran = self.find('span', 'rp-raceInfo__value rp-raceInfo__value_black')
+        ran = ran.replace('ran', '').strip()
 
-        if ran is not None:
-            return ran.replace('ran', '').strip()
+        if not ran:
+            return len(self.runner_info['num'])
 
-        return None
+        return int(ran)
 
     def get_numbers(self):
-        nums = xpath(self.doc, 'span', 'rp-horseTable__saddleClothNo', 'class', fn='/text()')
+        nums = self.xpath('span', 'rp-horseTable__saddleClothNo', 'class', fn='/text()')
         return [num.strip('.') for num in nums]
 
+    def get_official_ratings(self):
+        return self.xpath('td', 'OR', 'data-ending', fn='/text()')
+
+    def get_pedigrees(self):
+        pedigree = Pedigree(self.xpath('tr', 'block-pedigreeInfoFullResults', fn='/td'))
+
+        return (
+            pedigree.id_sires,
+            pedigree.sires,
+            pedigree.id_dams,
+            pedigree.dams,
+            pedigree.id_damsires,
+            pedigree.damsires,
+        )
+
     def get_positions(self):
-        positions = xpath(self.doc, 'span', 'text-horsePosition', fn='/text()')
+        positions = self.xpath('span', 'text-horsePosition', fn='/text()')
         del positions[1::2]
         positions = [pos.strip() for pos in positions]
 
@@ -518,7 +679,7 @@ class Race:
         return positions
 
     def get_prizemoney(self):
-        prizes = xpath(self.doc, 'div', 'text-prizeMoney', fn='/text()')
+        prizes = self.xpath('div', 'text-prizeMoney', fn='/text()')
         prize = [p.strip().replace(',', '').replace('£', '') for p in prizes]
         pos = self.runner_info['pos']
 
@@ -547,7 +708,7 @@ class Race:
             'h': '7',
         }
 
-        match = search(regex_class, self.race_info['race_name'])
+        match = search(regex_class, self.race_info['title'])
 
         if match:
             race_class = match.groups()[2].lower()
@@ -555,14 +716,17 @@ class Race:
                 return 'Class ' + classes[race_class]
             return 'Class ' + race_class
 
-        if '(premier handicap)' in self.race_info['race_name']:
+        if '(premier handicap)' in self.race_info['title']:
             return 'Class 2'
 
         return ''
 
+    def get_race_date(self):
+        return convert_date(self.url_split[6])
+
     def get_race_distances(self):
-        dist = find(self.doc, 'span', 'block-distanceInd')
-        dist_y = find(self.doc, 'span', 'block-fullDistanceInd').strip('()')
+        dist = self.find('span', 'block-distanceInd')
+        dist_y = self.find('span', 'block-fullDistanceInd').strip('()')
 
         try:
             dist_f = self.distance_to_furlongs(dist)
@@ -584,21 +748,42 @@ class Race:
 
         return dist, dist_y, dist_f, dist_m
 
+    def get_race_going(self):
+        return self.find('span', 'rp-raceTimeCourseName_condition', property='class')
+
+    def get_race_id(self):
+        return self.url_split[7]
+
+    def get_race_name(self):
+        return self.clean_race_name(self.race_info['title'])
+
+    def get_race_off(self):
+        return self.find('span', 'text-raceTime')
+
     def get_race_pattern(self):
-        match = search(regex_group, self.race_info['race_name'])
+        match = search(regex_group, self.race_info['title'])
 
         if match:
             pattern = f'{match.groups()[1]} {match.groups()[4]}'.title()
             return pattern.title()
 
-        if 'Forte Mile' in self.race_info['race_name'] and '(Group' in self.race_info['race_name']:
+        if 'Forte Mile' in self.race_info['title'] and '(Group' in self.race_info['title']:
             return 'Group 2'
 
-        if any(x in self.race_info['race_name'].lower() for x in {'listed race', '(listed'}):
+        if any(x in self.race_info['title'].lower() for x in {'listed race', '(listed'}):
             return 'Listed'
 
         return ''
 
+    def get_race_region(self):
+        return get_region(self.race_info['course_id'])
+
+    def get_race_surface(self):
+        return get_surface(self.race_info['going'])
+
+    def get_race_title(self):
+        return self.clean(self.find('h2', 'rp-raceTimeCourseName__title', property='class'))
+
     def get_race_type(self):
         race_type = ''
         race = self.race_info['race_name'].lower()
@@ -606,7 +791,7 @@ class Race:
         if self.race_info['code'] == 'flat' and 'national hunt flat' not in race:
             race_type = 'Flat'
         else:
-            fences = find(self.doc, 'span', 'rp-raceTimeCourseName_hurdles')
+            fences = self.find('span', 'rp-raceTimeCourseName_hurdles')
 
             if 'hurdle' in fences.lower():
                 race_type = 'Hurdle'
@@ -642,9 +827,12 @@ class Race:
 
         return race_type
 
-    def get_sexs(self, info):
+    def get_rprs(self):
+        return self.xpath('td', 'RPR', 'data-ending', fn='/text()')
+
+    def get_sexs(self):
         sexs = []
-        for x in info:
+        for x in self.xpath('tr', 'block-pedigreeInfoFullResults', fn='/td'):
             info_sex = x.text.strip().split()
             if len(info_sex) == 2:
                 sexs.append(info_sex[1].upper())
@@ -657,13 +845,19 @@ class Race:
 
         return sexs
 
+    def get_silk_urls(self):
+        return self.xpath('img', 'rp-horseTable__silk', 'class', fn='/@src')
+
     def get_starting_prices(self):
-        sps = xpath(self.doc, 'span', 'rp-horseTable__horse__price', 'class', fn='/text()')
+        sps = self.xpath('span', 'rp-horseTable__horse__price', 'class', fn='/text()')
         return [sp.replace('No Odds', '').strip() for sp in sps]
 
+    def get_topspeeds(self):
+        return self.xpath('td', 'TS', 'data-ending', fn='/text()')
+
     def get_weights(self):
-        st = xpath(self.doc, 'span', 'st', 'data-ending', fn='/text()')
-        lb = xpath(self.doc, 'span', 'lb', 'data-ending', fn='/text()')
+        st = self.xpath('span', 'st', 'data-ending', fn='/text()')
+        lb = self.xpath('span', 'lb', 'data-ending', fn='/text()')
 
         wgt = [f'{s}-{l}' for s, l in zip(st, lb)]
         lbs = [int(s) * 14 + int(l) for s, l in zip(st, lb)]
@@ -671,7 +865,7 @@ class Race:
         return wgt, lbs
 
     def get_winning_time(self):
-        result_info = self.doc.xpath('//div[@class="rp-raceInfo"]/ul/li')[0]
+        result_info = [li for div in self.elements[('div', 'class', 'rp-raceInfo')] for li in UL_LI(div)][0]
         time_info = result_info.findall('.//span[@class="rp-raceInfo__value"]')
 
         n = len(time_info)
@@ -712,7 +906,7 @@ class Race:
         return winning_time
 
     def parse_race_bands(self):
-        band = find(self.doc, 'span', 'rp-raceTimeCourseName_ratingBandAndAgesAllowed', property='class')
+        band = self.find('span', 'rp-raceTimeCourseName_ratingBandAndAgesAllowed', property='class')
         bands = band.strip('()').split(',')
 
         band_age = ''
@@ -750,10 +944,10 @@ class Race:
         else:
             return ''
 
-    def time_to_seconds(self, times):
+    def time_to_seconds(self):
         seconds = []
 
-        for time in times:
+        for time in self.runner_info['time']:
             if time == '-':
                 seconds.append('-')
             else:
@@ -0,0 +1,113 @@
+import asyncio
+import threading
+import time
+
+from collections import Counter
+from email.utils import parsedate_to_datetime
+
+
+class AdaptiveRate:
+    """
+    Paces requests at a rate that adapts to the server's responses (AIMD). Each fast
+    successful response adds increase requests per second up to max_rate. A 429, a 5xx,
+    a failed request or a response slower than latency_spike times the recent average
+    multiplies the rate by decrease, down to min_rate, and a Retry-After header holds
+    back every request until it has passed.
+    """
+
+    def __init__(self, rate=1.0, min_rate=None, max_rate=None, increase=0.1, decrease=0.5, latency_spike=3.0):
+        self.rate = rate
+        self.min_rate = min_rate or rate
+        self.max_rate = max_rate or rate
+        self.increase = increase
+        self.decrease = decrease
+        self.latency_spike = latency_spike
+
+        self.latency = None
+        self.next_time = time.monotonic()
+        self.lock = threading.Lock()
+        self.statuses = Counter()
+        self.errors = 0
+        self.backoffs = 0
+
+    @classmethod
+    def from_settings(cls, toml):
+        rate = toml.get('requests_per_second', 1.0)
+        return cls(
+            rate,
+            toml.get('min_requests_per_second', rate),
+            toml.get('max_requests_per_second', rate),
+        )
+
+    def delay(self):
+        """
+        Reserve the next request slot and return the seconds to wait for it. Slots are
+        reserved under a lock as requests can come from a background event loop and the
+        main thread at once.
+        """
+        with self.lock:
+            now = time.monotonic()
+            start = max(now, self.next_time)
+            self.next_time = start + 1 / self.rate
+            return start - now
+
+    def wait(self):
+        time.sleep(self.delay())
+
+    async def acquire(self):
+        await asyncio.sleep(self.delay())
+
+    def record(self, status, seconds, retry_after=None):
+        """
+        Adjust the rate for a response with status, or status None for a failed request.
+        """
+        if status is None:
+            self.errors += 1
+            return self.back_off(retry_after)
+
+        self.statuses[status] += 1
+
+        if status == 429 or status >= 500:
+            self.errors += 1
+            return self.back_off(retry_after)
+
+        spike = self.latency is not None and seconds > 1 and seconds > self.latency * self.latency_spike
+        self.latency = seconds if self.latency is None else 0.8 * self.latency + 0.2 * seconds
+
+        if spike:
+            self.back_off()
+        elif status < 400:
+            self.rate = min(self.max_rate, self.rate + self.increase)
+
+    def back_off(self, retry_after=None):
+        self.backoffs += 1
+        self.rate = max(self.min_rate, self.rate * self.decrease)
+
+        wait = retry_seconds(retry_after)
+        if wait:
+            self.next_time = max(self.next_time, time.monotonic() + wait)
+
+    def report(self):
+        statuses = ', '.join(f'{status}: {count}' for status, count in sorted(self.statuses.items()))
+        print(
+            f'Request rate: {self.rate:.2f}/s, {self.errors} errors, {self.backoffs} backoffs'
+            + (f' (responses {statuses})' if statuses else '')
+        )
+
+
+def retry_seconds(retry_after):
+    """
+    Seconds to wait from a Retry-After header, given either as seconds or as an HTTP date.
+    """
+    if not retry_after:
+        return 0
+
+    try:
+        return max(0.0, float(retry_after))
+    except ValueError:
+        pass
+
+    try:
+        return max(0.0, parsedate_to_datetime(retry_after).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return 0
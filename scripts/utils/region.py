@@ -1,14 +1,18 @@
+import os
+
+from functools import lru_cache
+from types import MappingProxyType
+
 from orjson import loads
 
+from utils.course import course_index
 
-def get_region(course_id):
-    courses = loads(open('../courses/_courses', 'r').read())
-    courses.pop('all')
 
-    for region, course in courses.items():
-        for _id in course.keys():
-            if _id == course_id:
-                return region.upper()
+REGIONS_PATH = os.path.normpath(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..', 'courses', '_regions'))
+
+
+def get_region(course_id):
+    return course_index().regions.get(course_id)
 
 
 def print_region(code, region):
@@ -20,8 +24,10 @@ def print_regions():
         print_region(code, region)
 
 
+@lru_cache(maxsize=None)
 def regions():
-    return loads(open('../courses/_regions', 'r').read())
+    with open(REGIONS_PATH, 'r') as f:
+        return MappingProxyType(loads(f.read()))
 
 
 def region_search(term):
@@ -1,6 +1,10 @@
 import os.path
 import tomli
 
+
+SETTINGS_PATH = os.path.normpath(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..', 'settings'))
+
+
 class Settings:
 
     def __init__(self):
@@ -18,8 +22,8 @@ class Settings:
         return fields
     
     def load_toml(self):
-        path_default_settings = '../settings/default_settings.toml'
-        path_user_settings = '../settings/user_settings.toml'
+        path_default_settings = os.path.join(SETTINGS_PATH, 'default_settings.toml')
+        path_user_settings = os.path.join(SETTINGS_PATH, 'user_settings.toml')
         
         settings_file = self.open_file(path_user_settings)
         if settings_file is None:
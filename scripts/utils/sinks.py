@@ -0,0 +1,201 @@
+import os
+import sqlite3
+
+from time import perf_counter
+
+from utils.columnar import FIELD_TYPES
+
+try:
+    import psycopg
+    from psycopg import sql
+except ImportError:
+    psycopg = None
+
+
+class DatabaseSink:
+    """
+    Base for sinks that load rows into a database table in batches.
+
+    config is the sink's table from the settings: table, batch_size and an optional
+    columns table mapping output column names to table column names. Without a mapping
+    every output column is loaded into a table column of the same name. When race_id and
+    horse_id are both loaded, rows replace any existing rows for the same race and horse.
+    """
+
+    def __init__(self, config, header):
+        self.table = config.get('table', 'race_results')
+        self.batch_size = config.get('batch_size', 5000)
+
+        mapping = config.get('columns') or {column: column for column in header}
+        mapped = [column for column in mapping if column in header]
+
+        self.mapped = mapped
+        self.indices = [header.index(column) for column in mapped]
+        self.columns = [mapping[column] for column in mapped]
+        self.key = None
+
+        if 'race_id' in mapped and 'horse_id' in mapped:
+            self.key = (mapping['race_id'], mapping['horse_id'])
+        else:
+            print(f'race_id and horse_id are not both loaded into {self.table}, rows will not be deduplicated.')
+
+        self.batch = []
+        self.rows = 0
+        self.seconds = 0.0
+
+    @property
+    def resumed(self):
+        return False
+
+    def write_header(self, fields):
+        pass
+
+    def write_rows(self, rows):
+        self.batch.extend([None if row[i] == '' else row[i] for i in self.indices] for row in rows)
+
+        if len(self.batch) >= self.batch_size:
+            self.flush()
+
+    def complete(self, race_id):
+        pass
+
+    def flush(self):
+        if not self.batch:
+            return
+
+        start = perf_counter()
+        self.load(self.batch)
+        self.seconds += perf_counter() - start
+
+        self.rows += len(self.batch)
+        self.batch = []
+
+    def load(self, rows):
+        raise NotImplementedError
+
+    def close(self):
+        pass
+
+    def report(self):
+        rate = self.rows / self.seconds if self.seconds else 0
+        print(f'Loaded {self.rows} rows into {self.table} in {self.seconds:.1f}s ({rate:.0f} rows/s)')
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        try:
+            if exc_type is None:
+                self.flush()
+                self.report()
+        finally:
+            self.close()
+
+
+class PostgresSink(DatabaseSink):
+    """
+    Streams rows into PostgreSQL with COPY through a temporary staging table.
+    """
+
+    def __init__(self, config, header):
+        if psycopg is None:
+            raise ImportError('psycopg is required for the postgres sink: pip3 install psycopg[binary]')
+
+        super().__init__(config, header)
+
+        self.conn = psycopg.connect(config['dsn'])
+        self.staging = sql.Identifier(f'{self.table}_staging')
+
+        table = sql.Identifier(self.table)
+        columns = sql.SQL(', ').join(map(sql.Identifier, self.columns))
+
+        with self.conn.transaction():
+            self.conn.execute(
+                sql.SQL('CREATE TEMP TABLE IF NOT EXISTS {} AS SELECT {} FROM {} WITH NO DATA').format(
+                    self.staging, columns, table
+                )
+            )
+
+        self.copy = sql.SQL('COPY {} ({}) FROM STDIN').format(self.staging, columns)
+        self.insert = sql.SQL('INSERT INTO {} ({}) SELECT {} FROM {}').format(
+            table, columns, columns, self.staging
+        )
+
+        self.delete = None
+        if self.key is not None:
+            race_id, horse_id = map(sql.Identifier, self.key)
+            self.delete = sql.SQL(
+                'DELETE FROM {table} t USING {staging} s WHERE t.{race_id} = s.{race_id} AND t.{horse_id} = s.{horse_id}'
+            ).format(table=table, staging=self.staging, race_id=race_id, horse_id=horse_id)
+
+    def load(self, rows):
+        with self.conn.transaction():
+            with self.conn.cursor() as cur:
+                with cur.copy(self.copy) as copy:
+                    for row in rows:
+                        copy.write_row(row)
+
+                if self.delete is not None:
+                    cur.execute(self.delete)
+
+                cur.execute(self.insert)
+                cur.execute(sql.SQL('TRUNCATE {}').format(self.staging))
+
+    def close(self):
+        self.conn.close()
+
+
+class SqliteSink(DatabaseSink):
+    """
+    Loads rows into a local SQLite database in WAL mode, creating the table and its indexes if needed.
+    """
+
+    INDEXED = ('horse', 'horse_id', 'date', 'course_id', 'race_id')
+    AFFINITY = {'date': 'TEXT', 'float': 'REAL', 'int': 'INTEGER', 'str': 'TEXT'}
+
+    def __init__(self, config, header):
+        super().__init__(config, header)
+
+        path = config.get('path', '../data/race_results.db')
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+
+        self.conn = sqlite3.connect(path)
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.conn.execute('PRAGMA synchronous=NORMAL')
+
+        table = quote(self.table)
+        output_columns = dict(zip(self.columns, self.mapped))
+        definitions = ', '.join(
+            f'{quote(column)} {self.AFFINITY[FIELD_TYPES.get(output_columns[column], "str")]}'
+            for column in self.columns
+        )
+
+        with self.conn:
+            self.conn.execute(f'CREATE TABLE IF NOT EXISTS {table} ({definitions})')
+
+            if self.key is not None:
+                self.conn.execute(
+                    f'CREATE UNIQUE INDEX IF NOT EXISTS {quote(self.table + "_race_horse")} '
+                    f'ON {table} ({quote(self.key[0])}, {quote(self.key[1])})'
+                )
+
+            for column in self.columns:
+                if output_columns[column] in self.INDEXED:
+                    self.conn.execute(
+                        f'CREATE INDEX IF NOT EXISTS {quote(self.table + "_" + column)} ON {table} ({quote(column)})'
+                    )
+
+        placeholders = ', '.join('?' for _ in self.columns)
+        columns = ', '.join(quote(column) for column in self.columns)
+        self.insert = f'INSERT OR REPLACE INTO {table} ({columns}) VALUES ({placeholders})'
+
+    def load(self, rows):
+        with self.conn:
+            self.conn.executemany(self.insert, rows)
+
+    def close(self):
+        self.conn.close()
+
+
+def quote(identifier):
+    return '"' + identifier.replace('"', '""') + '"'
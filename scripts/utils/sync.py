@@ -0,0 +1,68 @@
+import os
+
+from datetime import date, timedelta
+from orjson import dumps, loads
+
+
+class Manifest:
+    """
+    Race ids already written by --sync for a region and race type, the field set they were
+    written with and the last day checked, so each sync only scrapes races it has not seen.
+    """
+
+    def __init__(self, path, header):
+        self.path = path
+        self.header = header
+        self.races = set()
+        self.last_date = None
+        self.load()
+
+    def load(self):
+        try:
+            with open(self.path, 'rb') as f:
+                manifest = loads(f.read())
+        except FileNotFoundError:
+            return
+
+        if manifest['header'] != self.header:
+            raise ValueError(
+                f'Fields have changed since the last sync, move the synced output and {self.path} aside to start again.'
+            )
+
+        self.races = set(manifest['races'])
+        self.last_date = date.fromisoformat(manifest['last_date'])
+
+    def dates(self, lookback=3):
+        """
+        Days to check for new results, from lookback days before the last sync up to today
+        to pick up late results, or only yesterday and today on the first sync.
+        """
+        today = date.today()
+
+        if self.last_date is None:
+            start = today - timedelta(days=1)
+        else:
+            start = min(self.last_date, today) - timedelta(days=lookback)
+
+        return [start + timedelta(days=x) for x in range((today - start).days + 1)]
+
+    def update(self, race_ids, last_date):
+        """
+        Add race_ids to the manifest and record last_date as checked, replacing the file atomically.
+        """
+        self.races.update(race_ids)
+        self.last_date = last_date
+
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        tmp = self.path + '.tmp'
+
+        with open(tmp, 'wb') as f:
+            f.write(dumps({
+                'header': self.header,
+                'last_date': last_date.isoformat(),
+                'races': sorted(self.races),
+            }))
+            f.flush()
+            os.fsync(f.fileno())
+
+        os.replace(tmp, self.path)
@@ -0,0 +1,57 @@
+from utils.columnar import FIELD_TYPES
+
+
+NATIONALITIES = ('(IRE)', '(USA)', '(GB)', '(FR)', '(JPN)')
+
+# output column names that differ from the settings field names
+RENAME = {
+    'or': 'bhaor',
+}
+
+
+def strip_nationality(value):
+    if isinstance(value, str) and '(' in value:
+        for nat in NATIONALITIES:
+            value = value.replace(nat, '')
+    return value
+
+
+def zero_if_not_numeric(value):
+    try:
+        float(value)
+        return value
+    except (TypeError, ValueError):
+        return '0'
+
+
+# transforms applied to each value of a column, keyed by settings field name,
+# after strip_nationality which is applied to every text column
+TRANSFORMS = {
+    'pos': (zero_if_not_numeric,),
+    'secs': (zero_if_not_numeric,),
+    'or': (zero_if_not_numeric,),
+    'rpr': (zero_if_not_numeric,),
+    'ts': (zero_if_not_numeric,),
+}
+
+
+def output_header(fields):
+    return [RENAME.get(field, field) for field in fields]
+
+
+class RowTransform:
+    """
+    The output header and column transforms for fields. Race applies the transforms
+    as it builds its rows, in the parse workers.
+    """
+
+    def __init__(self, fields):
+        self.header = output_header(fields)
+        self.transforms = {}
+
+        for field in fields:
+            transforms = TRANSFORMS.get(field, ())
+            if FIELD_TYPES.get(field, 'str') == 'str':
+                transforms = (strip_nationality,) + transforms
+            if transforms:
+                self.transforms[field] = transforms
@@ -0,0 +1,286 @@
+import aiohttp
+import asyncio
+import importlib.util
+import requests
+import threading
+import time
+
+from time import perf_counter
+
+from requests.adapters import HTTPAdapter
+from urllib3.connection import HTTPConnection, HTTPSConnection
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+from urllib3.util.retry import Retry
+
+from utils.header import RandomHeader
+from utils.rate import AdaptiveRate
+
+try:
+    import httpx
+except ImportError:
+    httpx = None
+
+# HTTP/2 needs the h2 package from httpx[http2] as well
+if importlib.util.find_spec('h2') is None:
+    httpx = None
+
+
+RETRY_STATUS = (429, 500, 502, 503, 504)
+
+REQUEST_ERRORS = (requests.exceptions.RequestException,)
+if httpx is not None:
+    REQUEST_ERRORS += (httpx.HTTPError,)
+
+
+class TransportStats:
+
+    def __init__(self):
+        self.requests = 0
+        self.connections = 0
+        self.handshake = 0.0
+        self.dns_hits = 0
+        self.dns_misses = 0
+
+    def connected(self, seconds):
+        self.connections += 1
+        self.handshake += seconds
+
+    def report(self):
+        if not self.requests:
+            return
+
+        reused = max(0, self.requests - self.connections) / self.requests * 100
+        handshake = self.handshake / self.connections * 1000 if self.connections else 0
+
+        print(
+            f'Transport: {self.requests} requests over {self.connections} connections ({reused:.1f}% reused), '
+            f'{handshake:.1f}ms average connect and handshake'
+        )
+
+        if self.dns_hits or self.dns_misses:
+            print(f'DNS cache: {self.dns_hits} hits, {self.dns_misses} misses')
+
+
+def timed_connection(connection_cls, stats):
+    class TimedConnection(connection_cls):
+
+        def connect(self):
+            start = perf_counter()
+            super().connect()
+            stats.connected(perf_counter() - start)
+
+    return TimedConnection
+
+
+class PooledAdapter(HTTPAdapter):
+    """
+    HTTPAdapter whose connections record their connect and TLS handshake time in stats.
+    """
+
+    def __init__(self, stats, **kwargs):
+        self.stats = stats
+        super().__init__(**kwargs)
+
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+
+        http = type('TimedHTTPConnectionPool', (HTTPConnectionPool,), {
+            'ConnectionCls': timed_connection(HTTPConnection, self.stats)
+        })
+        https = type('TimedHTTPSConnectionPool', (HTTPSConnectionPool,), {
+            'ConnectionCls': timed_connection(HTTPSConnection, self.stats)
+        })
+
+        self.poolmanager.pool_classes_by_scheme = {'http': http, 'https': https}
+
+
+class Transport:
+    """
+    Keep-alive connection pools, retry settings and the adaptive request rate shared by
+    every request a script makes. Sequential requests go through one requests session, or
+    an HTTP/2 httpx client when http2 is set and httpx[http2] is installed. Concurrent
+    requests use aiohttp sessions from async_session with the same limits and a DNS cache.
+    Each session keeps one set of browser headers for all of its requests, rather than
+    looking like a new browser on every request over the same connection.
+    """
+
+    def __init__(self, toml=None):
+        toml = toml or {}
+
+        self.http2 = toml.get('http2', False)
+        self.pool_size = toml.get('pool_size', 10)
+        self.retries = toml.get('retries', 3)
+        self.backoff = toml.get('retry_backoff', 0.5)
+        self.timeout = toml.get('timeout', 30)
+        self.dns_ttl = toml.get('dns_cache_ttl', 300)
+
+        self.rate = AdaptiveRate.from_settings(toml)
+        self.random_header = RandomHeader()
+        self.stats = TransportStats()
+        self.client = None
+        self.connect_start = 0.0
+
+        if self.http2 and httpx is None:
+            print('httpx[http2] is not installed, using HTTP/1.1: pip3 install httpx[http2]')
+            self.http2 = False
+
+    def session(self):
+        if self.client is None:
+            self.client = self.http2_client() if self.http2 else self.requests_session()
+        return self.client
+
+    def requests_session(self):
+        # status codes are retried in get, so the rate sees every response
+        retry = Retry(total=self.retries, backoff_factor=self.backoff, respect_retry_after_header=False)
+        adapter = PooledAdapter(
+            self.stats, pool_connections=self.pool_size, pool_maxsize=self.pool_size, max_retries=retry
+        )
+
+        session = requests.Session()
+        session.headers.update(self.random_header.header())
+        session.mount('http://', adapter)
+        session.mount('https://', adapter)
+        return session
+
+    def http2_client(self):
+        # the client ignores http2 and limits when it is given a transport, so they go on the transport
+        return httpx.Client(
+            follow_redirects=True,
+            headers=self.random_header.header(),
+            timeout=self.timeout,
+            transport=httpx.HTTPTransport(
+                http2=True, retries=self.retries, limits=httpx.Limits(max_keepalive_connections=self.pool_size)
+            ),
+        )
+
+    def get(self, url, headers=None):
+        """
+        GET url on the shared session at the adaptive rate, retrying responses with a
+        RETRY_STATUS code. Returns a response with status_code, headers and content.
+        """
+        for attempt in range(self.retries + 1):
+            self.rate.wait()
+            start = perf_counter()
+
+            try:
+                r = self.request(url, headers)
+            except REQUEST_ERRORS:
+                self.rate.record(None, perf_counter() - start)
+                raise
+
+            self.rate.record(r.status_code, perf_counter() - start, r.headers.get('Retry-After'))
+
+            if r.status_code not in RETRY_STATUS or attempt == self.retries:
+                return r
+
+            time.sleep(self.backoff * 2 ** attempt)
+
+    def request(self, url, headers):
+        self.stats.requests += 1
+
+        if self.http2:
+            return self.session().get(url, headers=headers, extensions={'trace': self.trace})
+
+        return self.session().get(url, headers=headers, timeout=self.timeout)
+
+    def trace(self, event, info):
+        if event == 'connection.connect_tcp.started':
+            self.connect_start = perf_counter()
+        elif event == 'connection.connect_tcp.complete':
+            self.stats.connected(perf_counter() - self.connect_start)
+            self.connect_start = perf_counter()
+        elif event == 'connection.start_tls.complete':
+            self.stats.handshake += perf_counter() - self.connect_start
+
+    def async_session(self):
+        """
+        New aiohttp session, must be created inside the event loop it will be used on.
+        """
+        trace = aiohttp.TraceConfig()
+        trace.on_request_start.append(self.on_request_start)
+        trace.on_connection_create_start.append(self.on_connection_create_start)
+        trace.on_connection_create_end.append(self.on_connection_create_end)
+        trace.on_dns_cache_hit.append(self.on_dns_cache_hit)
+        trace.on_dns_cache_miss.append(self.on_dns_cache_miss)
+
+        return aiohttp.ClientSession(
+            connector=aiohttp.TCPConnector(limit=50, ttl_dns_cache=self.dns_ttl),
+            timeout=aiohttp.ClientTimeout(total=self.timeout),
+            headers=self.random_header.header(),
+            trace_configs=[trace],
+        )
+
+    async def on_request_start(self, session, context, params):
+        self.stats.requests += 1
+
+    async def on_connection_create_start(self, session, context, params):
+        context.connect_start = perf_counter()
+
+    async def on_connection_create_end(self, session, context, params):
+        self.stats.connected(perf_counter() - context.connect_start)
+
+    async def on_dns_cache_hit(self, session, context, params):
+        self.stats.dns_hits += 1
+
+    async def on_dns_cache_miss(self, session, context, params):
+        self.stats.dns_misses += 1
+
+    def close(self):
+        if self.client is not None:
+            self.client.close()
+            self.client = None
+
+
+class EventLoop:
+    """
+    An event loop and aiohttp session kept open across batches of requests, so pooled
+    connections are reused between batches rather than reopened by each asyncio.run.
+    After start() the loop runs in a background thread and coroutines are handed to it
+    with submit(), so requests carry on while the caller does other work.
+    """
+
+    def __init__(self, transport):
+        self.loop = asyncio.new_event_loop()
+        self.session = self.loop.run_until_complete(self.open_session(transport))
+        self.thread = None
+
+    async def open_session(self, transport):
+        return transport.async_session()
+
+    def run(self, coroutine):
+        if self.thread is not None:
+            return self.submit(coroutine).result()
+        return self.loop.run_until_complete(coroutine)
+
+    def start(self):
+        self.thread = threading.Thread(target=self.loop.run_forever, daemon=True)
+        self.thread.start()
+
+    def submit(self, coroutine):
+        """
+        Schedule coroutine on the background loop, returning a concurrent.futures.Future.
+        """
+        return asyncio.run_coroutine_threadsafe(coroutine, self.loop)
+
+    async def shutdown(self):
+        tasks = [task for task in asyncio.all_tasks() if task is not asyncio.current_task()]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        await self.session.close()
+
+    def close(self):
+        self.run(self.shutdown())
+
+        if self.thread is not None:
+            self.loop.call_soon_threadsafe(self.loop.stop)
+            self.thread.join()
+            self.thread = None
+
+        self.loop.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
@@ -0,0 +1,39 @@
+class View:
+    """
+    A named output of a scrape. Every race is parsed once and its rows are written to
+    each view, keeping only rows whose value for each filtered field is one of the
+    values listed for it, compared as strings since some fields are ints. Views other
+    than all write to the scrape's file name with a suffix, _2yo for a view named 2yo
+    unless suffix is set.
+    """
+
+    def __init__(self, name, config, header):
+        self.name = name
+        self.suffix = config.get('suffix', '' if name == 'all' else f'_{name}')
+        self.filters = []
+        self.filter_fields = {}
+
+        for field, values in config.get('filters', {}).items():
+            if field not in header:
+                raise ValueError(f'View {name} filters on {field}, which is not an enabled field.')
+            if not isinstance(values, list):
+                values = [values]
+            self.filter_fields[field] = {str(value) for value in values}
+            self.filters.append((header.index(field), self.filter_fields[field]))
+
+    def __call__(self, rows):
+        if not self.filters:
+            return rows
+        return [row for row in rows if all(str(row[i]) in values for i, values in self.filters)]
+
+
+def output_views(toml, header):
+    """
+    The views enabled in settings, or a single unfiltered view if there are none.
+    """
+    views = [
+        View(name, config, header)
+        for name, config in toml.get('views', {}).items()
+        if config.get('enabled', True)
+    ]
+    return views or [View('all', {}, header)]